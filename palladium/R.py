@@ -1,6 +1,13 @@
 """Support for building models using the R programming language.
 """
 
+from concurrent.futures import Future
+from functools import wraps
+import os
+import queue
+import threading
+import weakref
+
 from palladium.interfaces import DatasetLoader
 from palladium.interfaces import Model
 import numpy as np
@@ -20,30 +27,157 @@ from sklearn.preprocessing import LabelEncoder
 pandas2ri.activate()
 
 
+# Maps id(obj) to a tuple of (weakref to obj, fingerprint, R object):
+_conversion_cache = {}
+
+
+def _fingerprint(obj):
+    return (
+        type(obj),
+        getattr(obj, 'shape', None),
+        str(getattr(obj, 'dtype', None)),
+        )
+
+
+def _cached_conversion(obj, convert):
+    """Call *convert* on *obj* unless the same object was converted
+    before, in which case the previous result is returned.  Entries
+    are evicted when *obj* is garbage collected.
+    """
+    key = id(obj)
+    fingerprint = _fingerprint(obj)
+    entry = _conversion_cache.get(key)
+    if entry is not None and entry[0]() is obj and entry[1] == fingerprint:
+        return entry[2]
+
+    robj = convert(obj)
+    try:
+        ref = weakref.ref(obj)
+    except TypeError:
+        return robj
+    if entry is None:
+        weakref.finalize(obj, _conversion_cache.pop, key, None)
+    _conversion_cache[key] = (ref, fingerprint, robj)
+    return robj
+
+
+class _RWorker:
+    """Runs calls into R on a single, dedicated thread.
+
+    The embedded R interpreter isn't thread-safe, so concurrent
+    requests would otherwise have to contend for it, or worse, enter
+    it at the same time.  With the worker, requests queue up instead.
+    """
+
+    def __init__(self):
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def __call__(self, func, *args, **kwargs):
+        thread = self.thread
+        if thread is threading.current_thread():
+            return func(*args, **kwargs)
+        if thread is None or not thread.is_alive():
+            # Also restarts the thread in processes forked from the
+            # one that started it:
+            with self.lock:
+                if self.thread is thread:
+                    self.queue = queue.Queue()
+                    self.thread = threading.Thread(
+                        target=self._run, args=(self.queue,), daemon=True)
+                    self.thread.start()
+
+        future = Future()
+        self.queue.put((func, args, kwargs, future))
+        return future.result()
+
+    @staticmethod
+    def _run(requests):
+        while True:
+            func, args, kwargs, future = requests.get()
+            try:
+                future.set_result(func(*args, **kwargs))
+            except BaseException as exc:
+                future.set_exception(exc)
+            # Don't keep the last call's arguments alive while waiting:
+            del func, args, kwargs, future
+
+
+_r_worker = _RWorker()
+
+
+def _in_r_thread(func):
+    """Decorates *func* so that it runs in the R worker thread.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        return _r_worker(func, *args, **kwargs)
+    return wrapper
+
+
 class ObjectMixin:
     r = robjects.r
 
+    # Scripts already sourced into the (single) R interpreter, as
+    # tuples of (real path, modification time):
+    _sourced = set()
+
+    @_in_r_thread
     def __init__(self, scriptname, funcname, **kwargs):
         self.scriptname = scriptname
         self.funcname = funcname
-        self.r.source(scriptname)
+        self._source(scriptname)
         self.rfunc = self.r[funcname]
         self.kwargs = kwargs
 
+    def _source(self, scriptname):
+        path = os.path.realpath(scriptname)
+        try:
+            key = (path, os.path.getmtime(path))
+        except OSError:
+            key = None
+        if key is None or key not in ObjectMixin._sourced:
+            self.r.source(scriptname)
+            if key is not None:
+                ObjectMixin._sourced.add(key)
+
 
 class DatasetLoader(DatasetLoader, ObjectMixin):
     """A :class:`~palladium.interfaces.DatasetLoader` that calls an R
     function to load the data.
     """
+    @_in_r_thread
     def __call__(self):
         X, y = self.rfunc(**self.kwargs)
         return X, y
 
 
 class AbstractModel(Model, ObjectMixin):
-    def __init__(self, encode_labels=False, *args, **kwargs):
+    def __init__(self, encode_labels=False, cache_conversions=False,
+                 predict_chunksize=None, *args, **kwargs):
+        """
+        :param bool encode_labels:
+          If set to *True*, the *y* target array will be automatically
+          encoded using a :class:`sklearn.preprocessing.LabelEncoder`.
+
+        :param bool cache_conversions:
+          If set to *True*, I will remember the R representation of
+          the data arrays I'm passed, and reuse it when I'm called
+          again with the very same object, e.g. when scoring on the
+          training data after fitting.  Only use this if you don't
+          modify your data in place between calls.
+
+        :param int predict_chunksize:
+          If set, NumPy arrays and pandas data frames passed for
+          prediction are converted and sent to R in chunks of at most
+          this many rows, instead of all at once.  This limits the
+          amount of memory needed to hold the R copy of large
+          datasets.
+        """
         super(Model, self).__init__(*args, **kwargs)
         self.encode_labels = encode_labels
+        self.cache_conversions = cache_conversions
+        self.predict_chunksize = predict_chunksize
 
     @staticmethod
     def _from_python(obj):
@@ -55,14 +189,39 @@ class AbstractModel(Model, ObjectMixin):
             obj = numpy2ri(obj)
         return obj
 
+    def _to_r(self, obj):
+        if self.cache_conversions and isinstance(
+                obj, (DataFrame, Series, np.ndarray)):
+            return _cached_conversion(obj, self._from_python)
+        return self._from_python(obj)
+
+    @_in_r_thread
+    def _predict_r(self, X, predict=None, **kwargs):
+        predict = predict if predict is not None else self.r['predict']
+        chunksize = self.predict_chunksize
+        if (chunksize is None or
+                not isinstance(X, (DataFrame, np.ndarray)) or
+                len(X) <= chunksize):
+            X = self._to_r(X)
+            return np.asarray(predict(self.rmodel_, X, **kwargs))
+
+        return np.concatenate([
+            np.asarray(predict(
+                self.rmodel_,
+                self._from_python(X[start:start + chunksize]),
+                **kwargs))
+            for start in range(0, len(X), chunksize)
+            ])
+
+    @_in_r_thread
     def fit(self, X, y=None):
         if self.encode_labels:
             self.enc_ = LabelEncoder()
             y = self.enc_.fit_transform(y)
 
         self.rmodel_ = self.rfunc(
-            self._from_python(X),
-            self._from_python(y),
+            self._to_r(X),
+            self._to_r(y),
             **self.kwargs)
 
 
@@ -71,19 +230,52 @@ class ClassificationModel(AbstractModel):
     that uses an R model for training and prediction.
     """
 
+    def __init__(self, *args, predict_type=None, **kwargs):
+        """
+        :param str predict_type:
+          If set, :meth:`predict` will pass this as the *type* to R's
+          ``predict`` function and expect a factor of class labels in
+          return, e.g. ``'response'`` for randomForest models or
+          ``'class'`` for rpart models.  This avoids computing and
+          converting the full matrix of class probabilities.  By
+          default, :meth:`predict` picks the class with the highest
+          probability from :meth:`predict_proba`.
+        """
+        super().__init__(*args, **kwargs)
+        self.predict_type = predict_type
+
     def predict_proba(self, X):
-        X = self._from_python(X)
-        return np.asarray(self.r['predict'](self.rmodel_, X, type='prob'))
+        return self._predict_r(X, type='prob')
+
+    def _predict_codes(self, rmodel, X, **kwargs):
+        return self.r['as.integer'](self.r['predict'](rmodel, X, **kwargs))
 
     def predict(self, X):
-        X = X.astype(float) if hasattr(X, 'astype') else X
-        y_pred = np.argmax(self.predict_proba(X), axis=1)
+        if isinstance(X, np.ndarray):
+            X = X.astype(np.float64, copy=False)
+        elif isinstance(X, DataFrame):
+            if not (X.dtypes == np.float64).all():
+                X = X.astype(np.float64)
+        elif hasattr(X, 'astype'):
+            X = X.astype(float)
+        if self.predict_type is not None:
+            # R factor codes start at 1:
+            y_pred = self._predict_r(
+                X, self._predict_codes, type=self.predict_type) - 1
+        else:
+            y_pred = np.argmax(self.predict_proba(X), axis=1)
         if self.encode_labels:
             y_pred = self.enc_.inverse_transform(y_pred)
         return y_pred
 
     def score(self, X, y):
-        return accuracy_score(self.predict(X), np.asarray(y))
+        # Same as sklearn's accuracy_score, without its input checks:
+        y_pred, y = np.asarray(self.predict(X)), np.asarray(y)
+        if y.ndim == 1 and y_pred.shape == y.shape:
+            return float(np.mean(y_pred == y))
+        # Let scikit-learn validate anything out of the ordinary,
+        # e.g. y as a column vector:
+        return accuracy_score(y_pred, y)
 
 
 class RegressionModel(AbstractModel):
@@ -92,8 +284,7 @@ class RegressionModel(AbstractModel):
     """
 
     def predict(self, X):
-        X = self._from_python(X)
-        return np.asarray(self.r['predict'](self.rmodel_, X))
+        return self._predict_r(X)
 
     def score(self, X, y):
         return r2_score(self.predict(X), np.asarray(y))
@@ -118,16 +309,25 @@ class Rpy2Transform(TransformerMixin):
             self.colnames_ = X.colnames
         return self
 
+    @_in_r_thread
     def transform(self, X):
         if isinstance(X, (np.ndarray, list)) and hasattr(self, 'index2levels_'):
             X = DataFrame(X, columns=self.colnames_)
         if isinstance(X, DataFrame) and hasattr(self, 'index2levels_'):
-            for index, levels in self.index2levels_.items():
-                colname = X.columns[index]
-                X[colname] = Categorical(
-                    X[colname],
-                    categories=levels,
+            # Build the new frame in one go instead of assigning
+            # categorical columns one by one, which copies the data
+            # each time (and modifies the caller's frame):
+            index2levels = self.index2levels_
+            X = DataFrame({
+                colname: (
+                    Categorical(
+                        X.iloc[:, index].values,
+                        categories=index2levels[index],
+                        )
+                    if index in index2levels else X.iloc[:, index]
                     )
+                for index, colname in enumerate(X.columns)
+                }, index=X.index, copy=False)
             X = py2ri(X)
         if hasattr(self, 'colnames_'):
             # Deal with an rpy2 issue whereas colnames appear to get
@@ -1,6 +1,6 @@
-import pkg_resources
+from importlib.metadata import version
 
 try:
-    __version__ = pkg_resources.get_distribution("palladium").version
+    __version__ = version("palladium")
 except:
     __version__ = 'n/a'
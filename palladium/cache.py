@@ -7,12 +7,41 @@ database.
 
 import hashlib
 from functools import wraps
+import mmap
 import os
 import pickle
 from random import randrange
+import struct
 from tempfile import gettempdir
 
 from joblib import numpy_pickle
+import numpy as np
+
+
+def _hash_key(key, h):
+    """Feed *key* into the hash object *h* piece by piece, instead of
+    turning all of *key* into one large string first.  NumPy arrays
+    are hashed using their data buffer.
+    """
+    if isinstance(key, (tuple, list)):
+        h.update(b'(' if isinstance(key, tuple) else b'[')
+        for item in key:
+            _hash_key(item, h)
+            h.update(b',')
+        h.update(b')' if isinstance(key, tuple) else b']')
+    elif isinstance(key, dict):
+        h.update(b'{')
+        for name, value in key.items():
+            _hash_key(name, h)
+            h.update(b':')
+            _hash_key(value, h)
+            h.update(b',')
+        h.update(b'}')
+    elif isinstance(key, np.ndarray) and not key.dtype.hasobject:
+        h.update('array({}, {})'.format(key.dtype.str, key.shape).encode())
+        h.update(np.ascontiguousarray(key))
+    else:
+        h.update(repr(key).encode('utf-8'))
 
 
 class abstractcache(object):
@@ -64,11 +93,18 @@ class diskcache(abstractcache):
     you to purge existing cached values, then those cache files are
     found in the location defined in :attr:`filename_tmpl`.
     """
-    def __init__(self, *args, filename_tmpl=None, **kwargs):
+    def __init__(self, *args, filename_tmpl=None, mmap_mode=None, **kwargs):
         """
         :param str filename_tmpl:
           The filename template that I will use to store cache files,
           e.g. ``{}``.
+
+        :param str mmap_mode:
+          Passed on to :func:`joblib.load`.  By default, the whole
+          file is read into memory.  With ``'c'``, NumPy arrays are
+          memory-mapped copy-on-write, so only the parts that are
+          accessed are read from disk, and changes to the arrays
+          aren't written back to the cache file.
         """.format(diskcache.filename_tmpl)
         super().__init__(*args, **kwargs)
         if filename_tmpl is not None:
@@ -78,12 +114,14 @@ class diskcache(abstractcache):
                     "e.g., cache-{key}.pickle."
                     )
             self.filename_tmpl = filename_tmpl
+        self.mmap_mode = mmap_mode
 
     #: Where to persist cached values
     filename_tmpl = gettempdir() + '/pld/cache-{module}.{func}-{key}.pickle'
 
-    #: Using numpy_pickle.load
-    load = staticmethod(numpy_pickle.load)
+    def load(self, filename):
+        """Using numpy_pickle.load"""
+        return numpy_pickle.load(filename, mmap_mode=self.mmap_mode)
 
     #: Using numpy_pickle.dump
     dump = staticmethod(numpy_pickle.dump)
@@ -93,7 +131,9 @@ class diskcache(abstractcache):
         return self
 
     def _filename(self, key):
-        hashed_key = hashlib.sha1(str(key).encode('utf-8')).hexdigest()[:8]
+        h = hashlib.blake2b(digest_size=4)
+        _hash_key(key, h)
+        hashed_key = h.hexdigest()
         return self.filename_tmpl.format(
             module=self.func.__module__,
             func=self.func.__name__,
@@ -120,14 +160,60 @@ class picklediskcache(diskcache):
     """
     Same as diskcache, except that standard pickle is used instead of
     joblib's pickle functionality.
+
+    Values are pickled with protocol 5.  Large buffers such as the
+    data of NumPy arrays are written out-of-band after the pickle in
+    the same file, and are memory-mapped instead of copied when the
+    value is loaded.
     """
+    #: Marks files that have out-of-band buffers after the pickle
+    magic = b'PLDPKL5\n'
+
+    #: Buffers are aligned to this many bytes inside the file
+    alignment = 64
+
     def load(self, filename):
         with open(filename, 'rb') as f:
-            return pickle.load(f)
+            if f.read(len(self.magic)) != self.magic:
+                f.seek(0)
+                return pickle.load(f)
+            # ACCESS_COPY keeps the loaded arrays writable without
+            # ever writing back to the file:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+        view = memoryview(data)
+        offset = len(self.magic)
+        size, nbuffers = struct.unpack_from('<QQ', view, offset)
+        offset += 16
+        table = struct.unpack_from('<{}Q'.format(2 * nbuffers), view, offset)
+        offset += 16 * nbuffers
+        buffers = [
+            view[start:start + length]
+            for start, length in zip(table[::2], table[1::2])
+            ]
+        return pickle.loads(view[offset:offset + size], buffers=buffers)
 
     def dump(self, value, filename):
+        buffers = []
+        payload = pickle.dumps(
+            value, protocol=5, buffer_callback=buffers.append)
+        raws = [buffer.raw() for buffer in buffers]
+
+        offset = len(self.magic) + 16 + 16 * len(raws) + len(payload)
+        table = []
+        for raw in raws:
+            offset += -offset % self.alignment
+            table.extend([offset, raw.nbytes])
+            offset += raw.nbytes
+
         with open(filename, 'wb') as f:
-            return pickle.dump(value, f, -1)
+            f.write(self.magic)
+            f.write(struct.pack('<QQ', len(payload), len(raws)))
+            f.write(struct.pack('<{}Q'.format(len(table)), *table))
+            f.write(payload)
+            for start, raw in zip(table[::2], raws):
+                f.write(b'\0' * (start - f.tell()))
+                f.write(raw)
 
 
 def compute_key_attrs(attrs):
@@ -1,4 +1,6 @@
+from concurrent.futures import ThreadPoolExecutor
 from copy import deepcopy
+from functools import lru_cache
 import logging
 from logging.config import dictConfig
 import os
@@ -24,14 +26,12 @@ class Config(dict):
     Tries to send a more user friendly message in case of KeyError.
     """
     initialized = False
+    loaded = False
 
-    def __getitem__(self, name):
-        try:
-            return super(Config, self).__getitem__(name)
-        except KeyError:
-            raise KeyError(
-                "The required key '{}' was not found in your "
-                "configuration. {}".format(name, PALLADIUM_CONFIG_ERROR))
+    def __missing__(self, name):
+        raise KeyError(
+            "The required key '{}' was not found in your "
+            "configuration. {}".format(name, PALLADIUM_CONFIG_ERROR))
 
 
 _config = Config()
@@ -67,6 +67,14 @@ class ComponentHandler2(ComponentHandler):
     key = '__factory__'
 
 
+_missing = object()
+
+
+@lru_cache(maxsize=1024)
+def _split_path(dotted_path):
+    return tuple(dotted_path.split('.'))
+
+
 class CopyHandler:
     key = '__copy__'
 
@@ -75,17 +83,22 @@ class CopyHandler:
 
     @staticmethod
     def _resolve(configs, dotted_path):
-        for config in configs[::-1]:
+        parts = _split_path(dotted_path)
+        for config in reversed(configs):
             value = config
-            for part in dotted_path.split('.'):
-                try:
-                    value = value[part]
-                except KeyError:
-                    break
+            for part in parts:
+                if isinstance(value, dict):
+                    value = value.get(part, _missing)
+                    if value is _missing:
+                        break
+                else:
+                    try:
+                        value = value[part]
+                    except KeyError:
+                        break
             else:
                 return value
-        else:
-            raise KeyError(dotted_path)
+        raise KeyError(dotted_path)
 
     def __call__(self, name, props):
         dotted_path = props[self.key]
@@ -119,6 +132,11 @@ class CopyHandler:
         return value
 
 
+@lru_cache(maxsize=256)
+def _compile_statements(statements):
+    return compile(statements, '<palladium-config>', 'exec')
+
+
 class PythonHandler:
     key = '__python__'
 
@@ -127,10 +145,13 @@ class PythonHandler:
 
     def __call__(self, name, props):
         statements = props.pop(self.key)
+        config = self.config
+        # A fresh namespace for each block, so that names assigned in
+        # one block don't leak into the next:
         exec(
-            statements,
+            _compile_statements(statements),
             globals(),
-            {key: self.config for key in ['C', 'cfg', 'config']},
+            {'C': config, 'cfg': config, 'config': config},
             )
         return props
 
@@ -174,34 +195,130 @@ def _handlers_phase2(config):
         }
 
 
-def _run_config_handlers_recursive(props, handlers):
-    if isinstance(props, dict):
-        for key, value in tuple(props.items()):
-            if isinstance(value, dict):
-                _run_config_handlers_recursive(value, handlers)
-                for name, handler in handlers.items():
-                    if name in value:
-                        value = props[key] = handler(key, value)
-            elif isinstance(value, (list, tuple)):
-                _run_config_handlers_recursive(value, handlers)
-    elif isinstance(props, (list, tuple)):
-        for i, item in enumerate(props):
-            if isinstance(item, dict):
-                _run_config_handlers_recursive(item, handlers)
-                for name, handler in handlers.items():
-                    if name in item:
-                        item = props[i] = handler(str(i), item)
-            elif isinstance(item, (list, tuple)):
-                _run_config_handlers_recursive(item, handlers)
+# Types of values that are never containers.  Checking for these
+# first is quicker than calling isinstance for every leaf of the
+# configuration:
+_leaf_types = frozenset([str, int, float, bool, type(None)])
+
+
+def _container_kind(value):
+    """Return 'dict' or 'list' if *value* is a container that the
+    configuration walker descends into, None otherwise.
+    """
+    value_type = type(value)
+    if value_type in _leaf_types:
+        return None
+    if value_type is dict:
+        return 'dict'
+    if value_type is list or value_type is tuple:
+        return 'list'
+    if isinstance(value, dict):
+        return 'dict'
+    if isinstance(value, (list, tuple)):
+        return 'list'
+    return None
+
+
+def _config_items(props, kind):
+    if kind == 'dict':
+        return iter(tuple(props.items()))
+    else:
+        return enumerate(props)
+
+
+def _contains_keys(props, keys):
+    """Return True if any dict in *props* has one of *keys*.
+    """
+    stack = [props]
+    while stack:
+        props = stack.pop()
+        kind = _container_kind(props)
+        if kind == 'dict':
+            if any(key in props for key in keys):
+                return True
+            stack.extend(props.values())
+        elif kind == 'list':
+            stack.extend(props)
+    return False
+
+
+def _run_config_handlers_tree(props, handlers):
+    # Walks the configuration depth-first, like a recursive function
+    # would, but uses a stack of (container, kind, items, parent,
+    # parent_kind, key) instead of Python's call stack, so that deeply
+    # nested configurations don't hit the recursion limit.  Handlers
+    # are applied to a dict after all of its children were processed.
+    #
+    # Returns True if a handler put a value in place that holds keys
+    # of *handlers* itself, which this walk doesn't process.
+    pending = False
+    kind = _container_kind(props)
+    if kind is None:
+        return pending
+    stack = [(props, kind, _config_items(props, kind), None, None, None)]
+    while stack:
+        container, kind, items, parent, parent_kind, key = stack[-1]
+        for child_key, value in items:
+            child_kind = _container_kind(value)
+            if child_kind is not None:
+                stack.append((
+                    value, child_kind, _config_items(value, child_kind),
+                    container, kind, child_key,
+                    ))
+                break
+        else:
+            stack.pop()
+            if parent is None or kind != 'dict':
+                continue
+            name_key = key if parent_kind == 'dict' else str(key)
+            for name, handler in handlers.items():
+                if name in container:
+                    value = handler(name_key, container)
+                    if (value is not container and not pending and
+                            _contains_keys(value, handlers)):
+                        pending = True
+                    container = parent[key] = value
+    return pending
+
+
+def _copy_roots(*configs):
+    """Return the set of top-level keys that ``__copy__`` entries
+    anywhere in *configs* refer to.
+    """
+    roots = set()
+    stack = list(configs)
+    while stack:
+        props = stack.pop()
+        kind = _container_kind(props)
+        if kind == 'dict':
+            dotted_path = props.get(CopyHandler.key)
+            if isinstance(dotted_path, str):
+                roots.add(_split_path(dotted_path)[0])
+            stack.extend(props.values())
+        elif kind == 'list':
+            stack.extend(props)
+    return roots
 
 
 def _run_config_handlers(config, handlers):
+    return _run_config_handlers_pending(config, handlers)[0]
+
+
+def _run_config_handlers_pending(config, handlers):
+    """Like :func:`_run_config_handlers`, but returns a tuple of the
+    processed *config* and a flag that's True if handler keys were
+    left unprocessed.  See :func:`_run_config_handlers_tree`.
+    """
     wrapped_config = {'root': config}
-    _run_config_handlers_recursive(wrapped_config, handlers)
+    pending = False
+    # Scanning for handler keys is cheaper than walking the tree with
+    # handlers, and stops at the first key found:
+    if _contains_keys(config, handlers):
+        pending = _run_config_handlers_tree(wrapped_config, handlers)
     for handler in handlers.values():
         if hasattr(handler, 'finish'):
             handler.finish()
-    return wrapped_config['root']
+    return wrapped_config['root'], pending
 
 
 def _initialize_logging(config):
@@ -220,12 +337,21 @@ def process_config(
     config_final = {}
 
     for config in configs:
-        config_org = deepcopy(config_final)
+        # The snapshot of the configuration so far is only ever read
+        # by CopyHandler, so we copy just what '__copy__' refers to:
+        config_org = {
+            key: deepcopy(config_final[key])
+            for key in _copy_roots(config_final, config)
+            if key in config_final
+            }
         config_final.update(config)
-        _run_config_handlers(
-            config_final, handlers0([config_org, config]))
-        _run_config_handlers(
-            config_final, handlers0([config_final, {}]))
+        pending = _run_config_handlers_pending(
+            config_final, handlers0([config_org, config]))[1]
+        # A second pass is only needed for '__copy__' and other keys
+        # inside of values that were copied during the first pass:
+        if pending:
+            _run_config_handlers(
+                config_final, handlers0([config_final, {}]))
 
     _run_config_handlers(config_final, handlers1(config_final))
     _run_config_handlers(config_final, handlers2(config_final))
@@ -236,7 +362,27 @@ def process_config(
 _get_config_lock = threading.RLock()
 
 
+def _read_file(fname):
+    with open(fname) as f:
+        return f.read()
+
+
+def _read_files(fnames):
+    """Read the contents of all files in *fnames*.  Several files are
+    read in parallel, which helps on network file systems.
+    """
+    if len(fnames) < 2:
+        return [_read_file(fname) for fname in fnames]
+    with ThreadPoolExecutor(max_workers=min(len(fnames), 8)) as executor:
+        return list(executor.map(_read_file, fnames))
+
+
 def get_config(**extra):
+    # *initialized* is set early on during loading, so that components
+    # may call get_config() while they're being initialized.  Other
+    # threads can only skip the lock after loading is complete:
+    if _config.initialized and _config.loaded and not extra:
+        return _config
     with _get_config_lock:
         config = _get_config(**extra)
     return config
@@ -246,6 +392,7 @@ def _get_config(**extra):
     if not _config.initialized:
         _config.update(extra)
         _config.initialized = True
+        _config.loaded = False
 
         fnames = os.environ.get('PALLADIUM_CONFIG')
         if fnames is None:
@@ -258,15 +405,17 @@ def _get_config(**extra):
         if fnames is not None:
             configs = []
             fnames = [fname.strip() for fname in fnames.split(',')]
-            for fname in fnames:
-                sys.path.insert(0, os.path.dirname(fname))
-                with open(fname) as f:
-                    config = eval(f.read(), {
-                        'environ': os.environ,
-                        'here': os.path.abspath(os.path.dirname(fname)),
-                        })
+            dirnames = [os.path.abspath(os.path.dirname(fname))
+                        for fname in fnames]
+            for dirname, source in zip(dirnames, _read_files(fnames)):
+                sys.path.insert(0, dirname)
+                config = eval(source, {
+                    'environ': os.environ,
+                    'here': dirname,
+                    })
                 configs.append(config)
             _config.update(process_config(_config, *configs))
+        _config.loaded = True
     return _config
 
 
@@ -1,11 +1,19 @@
 """:class:`~palladium.interfaces.DatasetLoader` implementations.
 """
 
+from functools import lru_cache
+import mmap
+import os
+import threading
+
+import pandas
 import pandas.io.parsers
 import pandas.io.sql
 from sklearn.datasets import fetch_openml
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
 
+from .cache import diskcache
 from .interfaces import DatasetLoader
 from .util import logger
 from .util import PluggableDecorator
@@ -13,6 +21,48 @@ from .util import process_store
 from .util import RruleThread
 
 
+def _split_target(df, target_column, ndarray):
+    """Split *df* into the data and the *target_column*.  Neither
+    dropping the target column nor converting to NumPy arrays copies
+    the data where pandas can avoid it.
+    """
+    data, target = df, None
+    if target_column:
+        target = df[target_column]
+        data = df.drop(columns=[target_column])
+    if ndarray:
+        data = data.to_numpy(copy=False)
+        if target is not None:
+            target = target.to_numpy(copy=False)
+    return data, target
+
+
+_compressed_suffixes = ('.gz', '.bz2', '.zip', '.xz', '.zst', '.tar')
+
+
+@lru_cache(maxsize=64)
+def _skiprows_offset(path, mtime, size, skiprows, quotechar):
+    """Return the byte offset of the line after the first *skiprows*
+    lines in the file at *path*, or None if the file is too short or
+    the skipped lines contain *quotechar*, in which case they may hold
+    quoted line breaks.  A *quotechar* of None means that there's no
+    quoting.  *mtime* and *size* are only used to invalidate the
+    cache.
+    """
+    if not size:
+        return None
+    with open(path, 'rb') as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        offset = 0
+        for i in range(skiprows):
+            offset = mm.find(b'\n', offset) + 1
+            if not offset:
+                return None
+        if quotechar and mm.find(quotechar.encode(), 0, offset) != -1:
+            return None
+        return offset
+
+
 class CSV(DatasetLoader):
     """A :class:`~palladium.interfaces.DatasetLoader` that uses
     :func:`pandas.io.parsers.read_csv` to load data from a file or
@@ -42,7 +92,25 @@ class CSV(DatasetLoader):
           table to use, *skiprows* to skip a certain number of rows at
           the beginning and *nrows* to select a given number of rows
           only.
+
+          Passing *dtype* for the columns saves pandas from having to
+          infer them, and ``engine='pyarrow'`` will parse the file
+          using multiple threads, if :mod:`pyarrow` is installed.
+          Local files are read using *memory_map* unless you pass
+          ``memory_map=False``, or use the *pyarrow* engine.  When
+          *skiprows* is a number and the file is a local, uncompressed
+          file, I will seek past the skipped lines instead of having
+          pandas parse them.
+
+          If *usecols* is a list of column names, the *target_column*
+          is added to it automatically.
         """
+        usecols = kwargs.get('usecols')
+        if (target_column and isinstance(usecols, (list, tuple)) and
+                all(isinstance(col, str) for col in usecols) and
+                target_column not in usecols):
+            kwargs['usecols'] = list(usecols) + [target_column]
+
         self.path = path
         self.target_column = target_column
         self.ndarray = ndarray
@@ -51,16 +119,38 @@ class CSV(DatasetLoader):
     def __call__(self):
         """See :meth:`palladium.interfaces.DatasetLoader.__call__`.
         """
-        df = self.pandas_read(self.path, **self.kwargs)
-        data_columns = [col for col in df.columns if col != self.target_column]
-        data = df[data_columns]
-        target = None
-        if self.target_column:
-            target = df[self.target_column]
-        if self.ndarray:
-            return data.values, target.values if target is not None else None
+        kwargs = self.kwargs
+        offset = None
+        if isinstance(self.path, str) and os.path.isfile(self.path):
+            offset = self._skiprows_offset()
+            if offset is None and kwargs.get('engine') != 'pyarrow':
+                kwargs = dict(kwargs)
+                kwargs.setdefault('memory_map', True)
+
+        if offset is None:
+            df = self.pandas_read(self.path, **kwargs)
         else:
-            return data, target
+            kwargs = dict(kwargs)
+            del kwargs['skiprows']
+            with open(self.path, 'rb') as f:
+                f.seek(offset)
+                df = self.pandas_read(f, **kwargs)
+        return _split_target(df, self.target_column, self.ndarray)
+
+    def _skiprows_offset(self):
+        kwargs = self.kwargs
+        skiprows = kwargs.get('skiprows')
+        if (not isinstance(skiprows, int) or isinstance(skiprows, bool) or
+                skiprows <= 0 or
+                kwargs.get('compression', 'infer') not in ('infer', None) or
+                self.path.lower().endswith(_compressed_suffixes) or
+                kwargs.get('encoding') not in (None, 'utf-8', 'utf8') or
+                kwargs.get('lineterminator') is not None):
+            return None
+        stat = os.stat(self.path)
+        return _skiprows_offset(
+            os.path.realpath(self.path), stat.st_mtime_ns, stat.st_size,
+            skiprows, kwargs.get('quotechar', '"'))
 
 
 class Table(CSV):
@@ -71,6 +161,23 @@ class Table(CSV):
     pandas_read = staticmethod(pandas.io.parsers.read_table)
 
 
+def _concat_chunks(chunks):
+    """Concatenate the data frames in *chunks*, giving columns the
+    dtypes that they'd have had if they'd been read in one go.
+    """
+    df = pandas.concat(chunks, ignore_index=True)
+    # A chunk in which a column is all NULL has that column as
+    # object, which would make the column object in the result, too:
+    mixed = [
+        column for column in df.columns
+        if df[column].dtype == object and
+        any(chunk[column].dtype != object for chunk in chunks)
+        ]
+    if mixed:
+        df[mixed] = df[mixed].infer_objects()
+    return df
+
+
 class SQL(DatasetLoader):
     """A :class:`~palladium.interfaces.DatasetLoader` that uses
     :func:`pandas.io.sql.read_sql` to load data from an SQL database.
@@ -78,7 +185,8 @@ class SQL(DatasetLoader):
     """
     pandas_read = staticmethod(pandas.io.sql.read_sql)
 
-    def __init__(self, url, sql, target_column=None, ndarray=True, **kwargs):
+    def __init__(self, url, sql, target_column=None, ndarray=True,
+                 usecols=None, chunksize=None, **kwargs):
         """
         :param str url:
           The database *url* that'll be used to make a connection.
@@ -91,29 +199,64 @@ class SQL(DatasetLoader):
           The name of the column used as the target.  (All other
           columns are considered feature data.)
 
+        :param list usecols:
+          If given, only these columns (and the *target_column*) of
+          the table or query result in *sql* will be loaded.  The
+          selection is done by the database, so other columns aren't
+          transferred at all.
+
+        :param int chunksize:
+          If given, the number of rows to fetch from the database at
+          a time.  Rows are then streamed using a server-side cursor
+          where the database driver supports it, which keeps the
+          driver from buffering the complete result in addition to
+          the data frame.  By default, all rows are fetched at once.
+
         :param kwargs:
           All other keyword parameters are passed on to
           :func:`pandas.io.parsers.read_sql`.
         """
         self.engine = create_engine(url)
+        if usecols is not None:
+            columns = list(usecols)
+            if target_column and target_column not in columns:
+                columns.append(target_column)
+            if sql.split() == [sql] and '.' not in sql:
+                # A table name, which read_sql reads with only these
+                # columns itself:
+                kwargs['columns'] = columns
+            else:
+                sql = self._select_columns(sql, columns)
         self.sql = sql
+        self.usecols = usecols
         self.target_column = target_column
         self.ndarray = ndarray
+        self.chunksize = chunksize
         self.kwargs = kwargs
 
     def __call__(self):
         """See :meth:`palladium.interfaces.DatasetLoader.__call__`.
         """
-        df = self.pandas_read(self.sql, self.engine, **self.kwargs)
-        data_columns = [col for col in df.columns if col != self.target_column]
-        data = df[data_columns]
-        target = None
-        if self.target_column:
-            target = df[self.target_column]
-        if self.ndarray:
-            return data.values, target.values if target is not None else None
+        if self.chunksize is None:
+            df = self.pandas_read(self.sql, self.engine, **self.kwargs)
+        else:
+            with self.engine.connect() as connection:
+                connection = connection.execution_options(
+                    stream_results=True)
+                chunks = list(self.pandas_read(
+                    self.sql, connection, chunksize=self.chunksize,
+                    **self.kwargs))
+            df = _concat_chunks(chunks)
+        return _split_target(df, self.target_column, self.ndarray)
+
+    def _select_columns(self, sql, columns):
+        quote = self.engine.dialect.identifier_preparer.quote
+        if sql.split() == [sql]:  # a schema-qualified table name
+            source = '.'.join(quote(part) for part in sql.split('.'))
         else:
-            return data, target
+            source = '({}) _sub'.format(sql)
+        return 'SELECT {} FROM {}'.format(
+            ', '.join(quote(column) for column in columns), source)
 
 
 class OpenML(DatasetLoader):  # pragma: no cover
@@ -142,6 +285,99 @@ class EmptyDatasetLoader(DatasetLoader):
         return None, None
 
 
+def _stable_key(value):
+    """Return a representation of *value* for use in cache keys that
+    is the same across processes.  SQLAlchemy engines are represented
+    by their URL, with the password hidden.
+    """
+    if isinstance(value, Engine):
+        return str(value.url)
+    return value
+
+
+def _file_stamp(impl):
+    """Return the resolved path, modification time and size of the
+    local file at *impl.path*, or None if there's no such file.
+    """
+    path = getattr(impl, 'path', None)
+    if isinstance(path, str) and os.path.isfile(path):
+        stat = os.stat(path)
+        return os.path.realpath(path), stat.st_mtime_ns, stat.st_size
+    return None
+
+
+class DiskCacheDatasetLoader(DatasetLoader):
+    """A :class:`~palladium.interfaces.DatasetLoader` that caches the
+    data returned by another :class:`~palladium.interfaces.DatasetLoader`
+    in a file on disk, using :class:`palladium.cache.diskcache`.
+
+    Useful during development, when loading the data from a local file
+    is faster than loading it from its original source, e.g. a remote
+    database.  When loading from the cache, NumPy arrays are
+    memory-mapped instead of read into memory as a whole.
+
+    If *impl* has a *path* attribute that points to a local file, like
+    :class:`CSV` does, then changes to that file will result in a new
+    cache file.
+
+    To purge the cache, remove the cache files, which are found in the
+    location defined by *filename_tmpl*.
+    """
+    def __init__(self,
+                 impl,
+                 attrs=None,
+                 filename_tmpl=None,
+                 mmap_mode='c',
+                 ):
+        """
+        :param palladium.interfaces.DatasetLoader impl:
+          The underlying (decorated) dataset loader object.
+
+        :param list attrs:
+          The names of attributes of *impl* that identify the data it
+          loads, e.g. ``['engine', 'sql', 'target_column']`` for
+          :class:`SQL`.  Changing the value of any of these attributes
+          results in a different cache file.  Engines are identified
+          by their URL.  Defaults to all of *impl*'s public instance
+          attributes.
+
+        :param str filename_tmpl:
+          The filename template for cache files.  See
+          :class:`palladium.cache.diskcache`.
+
+        :param str mmap_mode:
+          How to memory-map NumPy arrays when loading from the cache.
+          Defaults to ``'c'``, i.e. copy-on-write.  See
+          :class:`palladium.cache.diskcache`.
+        """
+        if attrs is None:
+            attrs = sorted(
+                name for name in vars(impl) if not name.startswith('_'))
+        self.impl = impl
+        self.attrs = attrs
+        self.key = tuple(_stable_key(getattr(impl, attr)) for attr in attrs)
+
+        def load():
+            return impl()
+        load.__module__ = type(impl).__module__
+        load.__name__ = load.__qualname__ = type(impl).__name__
+
+        self._load = diskcache(
+            compute_key=self._compute_key,
+            filename_tmpl=filename_tmpl,
+            mmap_mode=mmap_mode,
+            )(load)
+
+    def __call__(self):
+        return self._load()
+
+    def _compute_key(self):
+        stamp = _file_stamp(self.impl)
+        if stamp is not None:
+            return self.key + (stamp,)
+        return self.key
+
+
 class ScheduledDatasetLoader(DatasetLoader):
     """A :class:`~palladium.interfaces.DatasetLoader` that loads
     periodically data into RAM to make it available to the prediction
@@ -160,10 +396,13 @@ class ScheduledDatasetLoader(DatasetLoader):
     """
     cache = process_store
     key = 'data'
+    _loaded = None
+    _load_error = None
 
     def __init__(self,
                  impl,
                  update_cache_rrule,
+                 eager=True,
                  ):
         """
         :param palladium.interfaces.DatasetLoader impl:
@@ -173,20 +412,50 @@ class ScheduledDatasetLoader(DatasetLoader):
           Keyword arguments for a :class:`dateutil.rrule.rrule` that
           determines when the cache will be updated.  See
           :class:`~palladium.util.RruleThread` for details.
+
+        :param bool eager:
+          If set to *False*, the initial load of the data will happen
+          in a background thread instead of during initialization, so
+          that the service can start up without waiting for it.
+          Calls that need the data before it's loaded will block until
+          it is.
         """
         self.impl = impl
         self.update_cache_rrule = update_cache_rrule
+        self.eager = eager
 
     def initialize_component(self, config):
-        self.update_cache()
-        logger.info("{}: initial fill of cache done.".format(
-            self.__class__.__name__))
+        if self.eager:
+            self._initial_fill()
+        else:
+            self._loaded = threading.Event()
+            threading.Thread(target=self._initial_fill, daemon=True).start()
 
         self.thread = RruleThread(
             func=self.update_cache, rrule=self.update_cache_rrule)
         self.thread.start()
 
+    def _initial_fill(self):
+        try:
+            self.update_cache()
+        except Exception as exc:
+            if self._loaded is None:
+                raise
+            logger.exception("{}: initial fill of cache failed.".format(
+                self.__class__.__name__))
+            self._load_error = exc
+        else:
+            logger.info("{}: initial fill of cache done.".format(
+                self.__class__.__name__))
+        finally:
+            if self._loaded is not None:
+                self._loaded.set()
+
     def __call__(self):
+        if self._loaded is not None and self.key not in self.cache:
+            self._loaded.wait()
+            if self.key not in self.cache and self._load_error is not None:
+                raise self._load_error
         return self.cache[self.key]
 
     @PluggableDecorator('update_data_decorators')
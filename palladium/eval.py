@@ -1,11 +1,12 @@
 """Utilities for testing the performance of a trained model.
 """
 
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pprint import pprint
 import sys
 
 from docopt import docopt
-from sklearn.metrics import get_scorer
 
 from .util import args_from_config
 from .util import initialize_config
@@ -13,20 +14,97 @@ from .util import logger
 from .util import timer
 
 
-@args_from_config
-def test(dataset_loader_test, model_persister,
-         scoring=None, model_version=None):
+def _timed(message, func, *args, **kwargs):
+    with timer(logger.info, message):
+        return func(*args, **kwargs)
+
+
+def _score_shared(model, X, y, scorers):
+    """Apply *scorers* through scikit-learn's multimetric scorer, so
+    that scorers that use the same prediction method share a single
+    call to it.
+
+    The multimetric scorer is private to scikit-learn.  If it's not
+    there, or doesn't take our arguments, we apply each scorer on its
+    own.
+    """
+    try:
+        from sklearn.metrics._scorer import _MultimetricScorer
+        try:
+            multi_scorer = _MultimetricScorer(scorers=scorers)
+        except TypeError:  # pragma: no cover
+            # scikit-learn < 1.2 takes the scorers as keyword arguments:
+            multi_scorer = _MultimetricScorer(**scorers)
+    except Exception:
+        return {key: scorer(model, X, y) for key, scorer in scorers.items()}
+    return multi_scorer(model, X, y)
+
+
+def _score_one(model, X, y, key, scorer):
+    return {key: scorer(model, X, y)}
+
+
+def _score(model, X, y, scorers, n_jobs=1):
+    """Return a dict with the results of applying all *scorers* to
+    *model*.
+
+    scikit-learn's own scorers are applied together, sharing their
+    predictions.  Other scorers can't share predictions.  With an
+    *n_jobs* other than 1, they're run in up to *n_jobs* parallel
+    threads instead (-1 for one thread each), which is only safe for
+    models that can predict from several threads at once.
+    """
+    try:
+        from sklearn.metrics._scorer import _BaseScorer
+    except ImportError:  # pragma: no cover
+        _BaseScorer = ()
+
+    shared = {
+        key: scorer for key, scorer in scorers.items()
+        if isinstance(scorer, _BaseScorer)
+        }
+    jobs = []
+    if len(shared) > 1:
+        jobs.append(partial(_score_shared, model, X, y, shared))
+    else:
+        shared = {}
+    jobs.extend(
+        partial(_score_one, model, X, y, key, scorer)
+        for key, scorer in scorers.items() if key not in shared
+        )
+
+    results = {}
+    if n_jobs != 1 and len(jobs) > 1:
+        max_workers = len(jobs) if n_jobs == -1 else min(n_jobs, len(jobs))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for result in executor.map(lambda job: job(), jobs):
+                results.update(result)
+    else:
+        for job in jobs:
+            results.update(job())
+    return {key: results[key] for key in scorers}
 
-    with timer(logger.info, "Loading data"):
-        X, y = dataset_loader_test()
 
-    with timer(logger.info, "Reading model"):
-        model = model_persister.read(version=model_version)
+@args_from_config
+def test(dataset_loader_test, model_persister,
+         scoring=None, model_version=None, n_jobs=1):
+
+    # Loading the data and reading the model don't depend on each
+    # other, and both are usually I/O bound, so we do them at the
+    # same time:
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        data_future = executor.submit(
+            _timed, "Loading data", dataset_loader_test)
+        model_future = executor.submit(
+            _timed, "Reading model", model_persister.read,
+            version=model_version)
+        X, y = data_future.result()
+        model = model_future.result()
 
     logger.info(
         'Loaded model version {}'.format(model.__metadata__['version']))
 
-    if not (hasattr(model, 'score') or scoring is not None):
+    if not (scoring is not None or hasattr(model, 'score')):
         raise ValueError(
             "Your model doesn't seem to implement a 'score' method.  You may "
             "want to define a 'scoring' option in the configuration."
@@ -35,11 +113,14 @@ def test(dataset_loader_test, model_persister,
     with timer(logger.info, "Applying model"):
         scores = []
         if scoring is not None:
+            from sklearn.metrics import get_scorer
             if not isinstance(scoring, dict):
                 scoring = {'score': scoring}
-            for key, scorer in scoring.items():
-                scorer = get_scorer(scorer)
-                scores.append("{}: {}".format(key, scorer(model, X, y)))
+            results = _score(model, X, y, {
+                key: get_scorer(scorer) for key, scorer in scoring.items()
+                }, n_jobs=n_jobs)
+            for key, result in results.items():
+                scores.append("{}: {}".format(key, result))
         else:
             scores.append("score: {}".format(model.score(X, y)))
 
@@ -63,12 +144,20 @@ Options:
 
   --model-version=<version>  The version of the model to be tested. If
                              not specified, the newest model will be used.
+
+  --n-jobs=<k>               Number of custom scorers to run in parallel
+                             threads.  Defaults to 'n_jobs' from the
+                             configuration, or 1.  Only use this with
+                             models that are thread-safe.
 """
     arguments = docopt(test_cmd.__doc__, argv=argv)
     model_version = arguments['--model-version']
     model_version = int(model_version) if model_version is not None else None
+    kwargs = {}
+    if arguments['--n-jobs'] is not None:
+        kwargs['n_jobs'] = int(arguments['--n-jobs'])
     initialize_config(__mode__='fit')
-    test(model_version=model_version)
+    test(model_version=model_version, **kwargs)
 
 
 @args_from_config
@@ -1,16 +1,21 @@
 """Utilities for fitting modles.
 """
 
+from concurrent.futures import ThreadPoolExecutor
 import gc
+import json
+import math
 from warnings import warn
 import sys
 
 from datetime import datetime
 from docopt import docopt
 from joblib import parallel_backend
-import pandas
-from sklearn.metrics import get_scorer
-from sklearn.model_selection import GridSearchCV
+import numpy as np
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
 
 from .interfaces import annotate
 from .util import apply_kwargs
@@ -21,14 +26,54 @@ from .util import PluggableDecorator
 from .util import timer
 
 
+def _json_value(value):
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+def _cv_results_json(cv_results):
+    """Return *cv_results* as a JSON list of records, one per
+    candidate, like :meth:`pandas.DataFrame.to_json` with
+    ``orient='records'`` does, but without building a data frame.
+    Masked and non-finite values become null.  Uses :mod:`orjson` for
+    encoding if it's installed.
+    """
+    columns = {
+        key: column.tolist() if hasattr(column, 'tolist') else list(column)
+        for key, column in cv_results.items()
+        }
+    records = [
+        {key: _json_value(value) for key, value in zip(columns, row)}
+        for row in zip(*columns.values())
+        ]
+    if orjson is not None:
+        try:
+            return orjson.dumps(
+                records, default=_json_default,
+                option=orjson.OPT_SERIALIZE_NUMPY,
+                ).decode('utf-8')
+        except orjson.JSONEncodeError:
+            # E.g. integers that don't fit into 64 bits:
+            pass
+    return json.dumps(records, default=_json_default)
+
+
 def _persist_model(model, model_persister, activate=True):
     metadata = {
         'train_timestamp': datetime.now().isoformat(),
         }
     cv_results = getattr(model, 'cv_results_', None)
     if cv_results is not None:
-        json_str = pandas.DataFrame(cv_results).to_json(orient='records')
-        metadata['cv_results'] = json_str
+        metadata['cv_results'] = _cv_results_json(cv_results)
     annotate(model, metadata)
     with timer(logger.info, "Writing model"):
         version = model_persister.write(model)
@@ -37,6 +82,11 @@ def _persist_model(model, model_persister, activate=True):
         model_persister.activate(version)
 
 
+def _load_test_data(dataset_loader_test):
+    with timer(logger.info, "Loading test data"):
+        return dataset_loader_test()
+
+
 @PluggableDecorator('fit_decorators')
 @args_from_config
 def fit(dataset_loader_train, model, model_persister, persist=True,
@@ -51,13 +101,14 @@ def fit(dataset_loader_train, model, model_persister, persist=True,
                 "provide a 'dataset_loader_test'."
                 )
 
-    if evaluate and not (hasattr(model, 'score') or scoring is not None):
+    if evaluate and not (scoring is not None or hasattr(model, 'score')):
         raise ValueError(
             "Your model doesn't seem to implement a 'score' method.  You may "
             "want to define a 'scoring' option in the configuration."
             )
 
     if scoring is not None:
+        from sklearn.metrics import get_scorer
         scorer = get_scorer(scoring)
     else:
         def scorer(model, X, y):
@@ -69,6 +120,13 @@ def fit(dataset_loader_train, model, model_persister, persist=True,
     with timer(logger.info, "Fitting model"):
         model.fit(X, y)
 
+    test_data = None
+    if evaluate and dataset_loader_test is not None:
+        # Load the test data while we evaluate on the train set:
+        executor = ThreadPoolExecutor(max_workers=1)
+        test_data = executor.submit(_load_test_data, dataset_loader_test)
+        executor.shutdown(wait=False)
+
     if evaluate:
         with timer(logger.debug, "Evaluating model on train set"):
             score_train = scorer(model, X, y)
@@ -79,14 +137,19 @@ def fit(dataset_loader_train, model, model_persister, persist=True,
     gc.collect()
 
     score_test = None
-    if evaluate and dataset_loader_test is not None:
-        with timer(logger.info, "Loading test data"):
-            X_test, y_test = dataset_loader_test()
+    if test_data is not None:
+        X_test, y_test = test_data.result()
+        test_data = None
         with timer(logger.debug, "Evaluating model on test set"):
             score_test = scorer(model, X_test, y_test)
             annotate(model, {'score_test': score_test})
             logger.info("Test score:  {}".format(score_test))
 
+        # Free the test data before the model is serialized, which
+        # needs a lot of memory itself:
+        X_test, y_test = None, None
+        gc.collect()
+
     if persist:
         if (persist_if_better_than is not None and
             score_test < persist_if_better_than):
@@ -195,7 +258,8 @@ def with_parallel_backend(
 
 @args_from_config
 def grid_search(dataset_loader_train, model, grid_search, scoring=None,
-                save_results=None, persist_best=False, model_persister=None):
+                save_results=None, persist_best=False, model_persister=None,
+                n_jobs=None):
     if persist_best and model_persister is None:
         raise ValueError(
             "Cannot persist the best model without a model_persister. Please "
@@ -206,10 +270,14 @@ def grid_search(dataset_loader_train, model, grid_search, scoring=None,
         X, y = dataset_loader_train()
 
     if isinstance(grid_search, dict):
+        from sklearn.model_selection import GridSearchCV
         search_kwargs = {
             'refit': persist_best,
+            'n_jobs': -1,
             }
         search_kwargs.update(grid_search)
+        if n_jobs is not None:
+            search_kwargs['n_jobs'] = n_jobs
 
         cv = search_kwargs.get('cv', None)
         if callable(cv):
@@ -226,7 +294,7 @@ def grid_search(dataset_loader_train, model, grid_search, scoring=None,
         elif scoring is not None:
             search_kwargs['scoring'] = scoring
 
-        if not (hasattr(model, 'score') or scoring is not None):
+        if not (scoring is not None or hasattr(model, 'score')):
             raise ValueError(
                 "Your model doesn't seem to implement a 'score' method.  You may "
                 "want to define a 'scoring' option in the configuration."
@@ -239,11 +307,16 @@ def grid_search(dataset_loader_train, model, grid_search, scoring=None,
     with timer(logger.info, "Running grid search"):
         search.fit(X, y)
 
-    results = pandas.DataFrame(search.cv_results_)
+    import pandas
+    cv_results = search.cv_results_
+    results = pandas.DataFrame(cv_results)
     pandas.options.display.max_rows = len(results)
     pandas.options.display.max_columns = len(results.columns)
-    if 'rank_test_score' in results:
-        results = results.sort_values('rank_test_score')
+    if 'rank_test_score' in cv_results:
+        # A stable sort keeps candidates with equal rank in the order
+        # in which they were evaluated:
+        order = np.argsort(cv_results['rank_test_score'], kind='stable')
+        results = results.take(order)
     print(results)
     if save_results:
         results.to_csv(save_results, index=False)
@@ -260,17 +333,24 @@ Uses 'dataset_loader_train', 'model', and 'grid_search' from the
 configuration to load a training dataset, and run a grid search on the
 model using the grid of hyperparameters.
 
+Candidates are evaluated in parallel on all CPU cores, unless
+'n_jobs' is set in 'grid_search' or passed with '--n-jobs'.  Use
+'--n-jobs=1' to run serially, e.g. for debugging.
+
 Usage:
   pld-grid-search [options]
 
 Options:
   --save-results=<fname>   Save results to CSV file
   --persist-best           Persist the best model from grid search
+  --n-jobs=<k>             Number of jobs to run in parallel
   -h --help                Show this screen.
 """
     arguments = docopt(grid_search_cmd.__doc__, argv=argv)
+    n_jobs = arguments['--n-jobs']
     initialize_config(__mode__='fit')
     grid_search(
         save_results=arguments['--save-results'],
         persist_best=arguments['--persist-best'],
+        n_jobs=int(n_jobs) if n_jobs is not None else None,
         )
@@ -11,17 +11,19 @@ from .util import PluggableDecorator
 
 
 def annotate(obj, metadata=None):
-    base_metadata = getattr(obj, '__metadata__', {})
-    if metadata is not None:
-        base_metadata.update(metadata)
-        obj.__metadata__ = base_metadata
-    return obj.__metadata__
+    if metadata is None:
+        return getattr(obj, '__metadata__', {})
+    # Build a new dict instead of updating the existing one, which
+    # may be shared with other objects, e.g. through a class attribute:
+    merged = {**getattr(obj, '__metadata__', {}), **metadata}
+    obj.__metadata__ = merged
+    return merged
 
 
 class DatasetLoaderMeta(ABCMeta):
     def __init__(cls, name, bases, attrs, **kwargs):
         super().__init__(name, bases, attrs, **kwargs)
-        cls.__call__ = PluggableDecorator('load_data_decorators')(cls.__call__)
+        PluggableDecorator('load_data_decorators').install(cls, '__call__')
 
 
 class DatasetLoader(metaclass=DatasetLoaderMeta):
@@ -45,6 +47,11 @@ class DatasetLoader(metaclass=DatasetLoaderMeta):
           *target* may be ``None`` if there is no target value,
           e.g. in an unsupervised learning setting.
 
+          Prefer returning NumPy arrays (or pandas data frames) over
+          plain Python lists.  Lists are converted to arrays by the
+          model every time it's fitted or scored, which is a
+          measurable cost for large datasets.
+
         :rtype: tuple
         """
 
@@ -113,6 +120,9 @@ class PredictError(Exception):
     """Raised by :meth:`Model.predict` to indicate that some condition
     made it impossible to deliver a prediction.
     """
+    # Keeps instances from allocating a __dict__:
+    __slots__ = ('error_message', 'error_code')
+
     def __init__(self, error_message, error_code=-1):
         self.error_message = error_message
         self.error_code = error_code
@@ -124,8 +134,8 @@ class PredictError(Exception):
 class ModelPersisterMeta(ABCMeta):
     def __init__(cls, name, bases, attrs, **kwargs):
         super().__init__(name, bases, attrs, **kwargs)
-        cls.read = PluggableDecorator('read_model_decorators')(cls.read)
-        cls.write = PluggableDecorator('write_model_decorators')(cls.write)
+        PluggableDecorator('read_model_decorators').install(cls, 'read')
+        PluggableDecorator('write_model_decorators').install(cls, 'write')
 
 
 class ModelPersister(metaclass=ModelPersisterMeta):
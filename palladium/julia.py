@@ -1,21 +1,66 @@
+import copyreg
+import pickle
+import threading
+
 from julia import Julia
+import numpy as np
 from sklearn.metrics import accuracy_score
-from sklearn.preprocessing import LabelEncoder
 
 from palladium.interfaces import Model
 from palladium.util import logger
 from palladium.util import timer
 
 
-def make_bridge():  # pragma: no cover
-    with timer(logger.info, "Creating Julia bridge"):
-        return Julia()
+_bridge = None
+_bridge_lock = threading.Lock()
+_julia_funcs = {}
+_julia_imports = set()
+
+
+def make_bridge():
+    """Return the process-wide Julia bridge, creating it on first use.
+    """
+    global _bridge
+    with _bridge_lock:
+        if _bridge is None:
+            with timer(logger.info, "Creating Julia bridge"):
+                _bridge = Julia()
+    return _bridge
+
+
+# Serialize into a byte vector and back, in one call each:
+_SERIALIZE = "x -> (buf = IOBuffer(); serialize(buf, x); take!(buf))"
+_DESERIALIZE = "data -> deserialize(IOBuffer(data))"
+
+
+def _julia_eval(bridge, code):
+    key = bridge, code
+    value = _julia_funcs.get(key)
+    if value is None:
+        value = _julia_funcs[key] = bridge.eval(code)
+    return value
+
+
+def _julia_func(bridge, name):
+    if (bridge, name) not in _julia_funcs:
+        module = name.rpartition('.')[0]
+        if (bridge, module) not in _julia_imports:
+            bridge.call("import {}".format(module))
+            _julia_imports.add((bridge, module))
+    return _julia_eval(bridge, name)
+
+
+def _to_julia(X):
+    # Julia functions receive samples as columns.  PyCall only shares
+    # memory with Fortran-ordered arrays, which ``X.T`` already is for
+    # the usual C-ordered *X*; anything else is copied once here.
+    return np.asfortranarray(X.T)
 
 
 class AbstractModel(Model):
     def __init__(self, fit_func, predict_func,
                  fit_kwargs=None, predict_kwargs=None,
-                 encode_labels=False):
+                 encode_labels=False, warmup=False):
         """
         Instantiates a model with the given *fit_func* and
         *predict_func* written in Julia.
@@ -39,49 +84,50 @@ class AbstractModel(Model):
 
         :param bool encode_labels:
           If set to *True*, the *y* target array will be automatically
-          encoded using a :class:`sklearn.preprocessing.LabelEncoder`,
-          which is useful if you have string labels but your Julia
-          function only accepts numeric labels.
+          encoded as indices into the sorted unique labels, which is
+          useful if you have string labels but your Julia function
+          only accepts numeric labels.
+
+        :param bool warmup:
+          If set to *True*, *predict_func* is called once on a single
+          row of zeros whenever a fitted model is loaded.  Julia then
+          compiles the function while the model is being loaded,
+          instead of during the first prediction.
         """
         self.fit_func = fit_func
         self.predict_func = predict_func
         self.encode_labels = encode_labels
         self.fit_kwargs = fit_kwargs or {}
         self.predict_kwargs = predict_kwargs or {}
+        self.warmup = warmup
 
     def fit(self, X, y):
         self._initialize_julia()
         if self.encode_labels:
-            self.enc_ = LabelEncoder()
-            y = self.enc_.fit_transform(y)
-        self.fitted_ = self.fit_func_(X.T, y, **self.fit_kwargs)
+            self.classes_, y = np.unique(y, return_inverse=True)
+        self.n_features_in_ = X.shape[1]
+        self.fitted_ = self.fit_func_(_to_julia(X), y, **self.fit_kwargs)
         return self
 
     def predict(self, X):
-        X = X.astype(float)
-        y_pred = self.predict_func_(self.fitted_, X.T, **self.predict_kwargs)
+        X = X.astype(float, copy=False)
+        y_pred = self.predict_func_(
+            self.fitted_, _to_julia(X), **self.predict_kwargs)
         if self.encode_labels:
-            y_pred = self.enc_.inverse_transform(y_pred)
+            y_pred = self.classes_[np.asarray(y_pred)]
         return y_pred
 
     def _initialize_julia(self):
-        fit_1, fit_2 = self.fit_func.rsplit('.', 1)
-        predict_1, predict_2 = self.predict_func.rsplit('.', 1)
-
         bridge = self.bridge_ = make_bridge()
-        bridge.call("import {}".format(fit_1))
-        bridge.call("import {}".format(predict_1))
-        self.fit_func_ = bridge.eval(self.fit_func)
-        self.predict_func_ = bridge.eval(self.predict_func)
+        self.fit_func_ = _julia_func(bridge, self.fit_func)
+        self.predict_func_ = _julia_func(bridge, self.predict_func)
 
-    def __getstate__(self):
+    def _getstate(self, wrap):
         state = self.__dict__.copy()
 
         # Serialize the fitted attribute in Julia:
-        iobuf = self.bridge_.eval("IOBuffer()")
-        self.bridge_.eval('serialize')(iobuf, self.fitted_)
-        iobuf.seek(0)
-        state['fitted_'] = iobuf.read()
+        serialize = _julia_eval(self.bridge_, _SERIALIZE)
+        state['fitted_'] = wrap(serialize(self.fitted_))
 
         del state['fit_func_']
         del state['predict_func_']
@@ -89,18 +135,54 @@ class AbstractModel(Model):
 
         return state
 
+    def __getstate__(self):
+        return self._getstate(bytes)
+
+    def __reduce_ex__(self, protocol):
+        if protocol < 5:
+            return super().__reduce_ex__(protocol)
+        # Let pickle write the serialized Julia data straight from
+        # the buffer Julia returned, or hand it out-of-band:
+        state = self._getstate(
+            lambda data: pickle.PickleBuffer(memoryview(data).toreadonly()))
+        return copyreg.__newobj__, (type(self),), state
+
     def __setstate__(self, state):
+        if 'enc_' in state:
+            # Models pickled with a LabelEncoder:
+            state = state.copy()
+            state['classes_'] = state.pop('enc_').classes_
         self.__dict__.update(state)
         self._initialize_julia()
 
-        # Deserialize the fitted Julia attribute:
-        fitted = state['fitted_']
-        iobuf = self.bridge_.eval("IOBuffer()")
-        iobuf.write(fitted)
-        iobuf.seek(0)
-        self.fitted_ = self.bridge_.eval('deserialize')(iobuf)
+        # Deserialize the fitted Julia attribute.  Protocol 5 pickles
+        # may give us a PickleBuffer or memoryview, which PyCall
+        # doesn't pass on as a byte vector:
+        deserialize = _julia_eval(self.bridge_, _DESERIALIZE)
+        self.fitted_ = deserialize(bytes(state['fitted_']))
+
+        if getattr(self, 'warmup', False):
+            self._warmup()
+
+    def _warmup(self):
+        n_features = getattr(self, 'n_features_in_', None)
+        if n_features is None:
+            return
+        X = np.zeros((1, n_features))
+        with timer(logger.info, "Warming up {}".format(self.predict_func)):
+            try:
+                self.predict_func_(
+                    self.fitted_, _to_julia(X), **self.predict_kwargs)
+            except Exception as e:
+                logger.warning(
+                    "Warming up {} failed: {!r}".format(self.predict_func, e))
 
 
 class ClassificationModel(AbstractModel):
     def score(self, X, y):
-        return accuracy_score(self.predict(X), y)
+        y_pred, y = np.asarray(self.predict(X)), np.asarray(y)
+        if (y.ndim == 1 and y.size and y_pred.shape == y.shape and
+                y_pred.dtype.kind == y.dtype.kind):
+            return float(np.mean(y_pred == y))
+        # Let scikit-learn validate anything out of the ordinary:
+        return accuracy_score(y_pred, y)
@@ -2,18 +2,37 @@
 """
 import logging
 from abc import abstractmethod
+import atexit
 import base64
+import binascii
+from bisect import bisect_right
 from contextlib import contextmanager
+from contextlib import suppress
+import copy
 import gzip
 import io
 import json
 import os
+from packaging.version import Version
 import pickle
+import queue
 import codecs
-from pkg_resources import parse_version
-from tempfile import TemporaryFile
+from concurrent.futures import ThreadPoolExecutor
+import sys
+import struct
+from tempfile import SpooledTemporaryFile
+from threading import Event
 from threading import Lock
-
+from time import monotonic
+
+try:
+    from isal import igzip
+except ImportError:  # pragma: no cover
+    igzip = None
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
 import requests
 from sqlalchemy import create_engine
 from sqlalchemy import CLOB
@@ -35,28 +54,69 @@ from .interfaces import ModelPersister
 from .util import logger
 from .util import PluggableDecorator
 from .util import process_store
+from .util import resolve_dotted_name
 from .util import RruleThread
 from .util import session_scope
 
+# Protocol 5 writes NumPy arrays' data straight from their buffers,
+# without making a copy first.  Models written with it can be read by
+# Python 3.8 and later:
+PICKLE_PROTOCOL = 5
+
+# gzip's own default of 9 compresses pickled models barely better
+# than 6 (zlib's default), but typically takes ten times as long:
+GZIP_COMPRESSLEVEL = 6
+
+# Models up to this size are held in memory before Rest uploads them,
+# larger ones are spooled to a temporary file:
+SPOOL_MAX_SIZE = 64 * 1024 * 1024
+
+# Streaming uploads are sent in chunks of this size, with at most this
+# many chunks waiting to be sent:
+STREAM_CHUNK_SIZE = 1024 * 1024
+STREAM_QUEUE_SIZE = 4
+
+
+def _gzip(compresslevel=None):
+    # python-isal's igzip is a faster drop-in replacement for gzip
+    # that reads and writes the same format, but it only compresses
+    # at levels 0 to 3:
+    if igzip is not None and (compresslevel is None or compresslevel <= 3):
+        return igzip
+    return gzip
+
+
+def _json_loads(text):
+    # orjson parses the metadata a lot faster than json does, but it
+    # rejects the NaN and Infinity that json.dumps writes by default:
+    if orjson is not None:
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(text)
+
 
 class UpgradeSteps:
     def __init__(self):
         self.steps = []
+        self._sorted = None
 
     def add(self, version):
         def decorator(func):
-            self.steps.append((parse_version(version), func))
+            self.steps.append((Version(version), func))
+            self._sorted = None
             return func
         return decorator
 
     def run(self, persister, from_version, to_version):
-        from_version = parse_version(from_version)
-        to_version = parse_version(to_version)
-        results = []
-        for version, func in sorted(self.steps):
-            if from_version < version <= to_version:
-                results.append(func(persister))
-        return results
+        if self._sorted is None:
+            steps = sorted(self.steps, key=lambda step: step[0])
+            self._sorted = [version for version, func in steps], steps
+        versions, steps = self._sorted
+        start = bisect_right(versions, Version(from_version))
+        stop = bisect_right(versions, Version(to_version))
+        return [func(persister) for version, func in steps[start:stop]]
 
 
 class FileLikeIO:
@@ -97,6 +157,17 @@ class FileLikeIO:
         ```
         """
 
+    def stamp(self, path):
+        """Return a value that changes whenever the file at *path*
+        changes.  Return *False* if the file doesn't exist, *True* if
+        it exists but no such value is available, and *None* if
+        neither is known, in which case callers use :meth:`exists`.
+
+        :class:`FileLike` uses this to avoid reading its metadata file
+        again when it hasn't changed.
+        """
+        return None
+
 
 class FileIO(FileLikeIO):
     def open(self, path, mode='r'):
@@ -105,14 +176,50 @@ class FileIO(FileLikeIO):
     def exists(self, path):
         return os.path.exists(path)
 
+    def stamp(self, path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return False
+        # A rewrite that keeps the size and lands within the same
+        # tick of the file system's clock goes unnoticed.  FileLike
+        # forgets the stamp whenever it writes the file itself:
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
     def remove(self, path):
         os.remove(path)
 
 
 class RestIO(FileLikeIO):
-    def __init__(self, auth):
+    def __init__(self, auth, spool_max_size=SPOOL_MAX_SIZE,
+                 stream_uploads=False):
         self.session = requests.Session()
         self.session.auth = auth
+        self.spool_max_size = spool_max_size
+        self.stream_uploads = stream_uploads
+
+    @contextmanager
+    def _stream(self, url):
+        # Send what's written while it's being written, in chunks,
+        # from another thread.  The queue keeps the writer from
+        # getting too far ahead of the upload:
+        chunks = queue.Queue(maxsize=STREAM_QUEUE_SIZE)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(
+                self.session.put, url, data=_iter_queue(chunks))
+            fh = _ChunkStream(STREAM_CHUNK_SIZE, chunks, future)
+            try:
+                yield fh
+            except BaseException as exc:
+                # Make the upload fail instead of leaving a partial file
+                # behind, unless it's failed already:
+                with suppress(IOError):
+                    fh.put(IOError("Upload aborted: {!r}".format(exc)))
+                raise
+            fh.close()
+            fh.put(None)
+            res = future.result()
+        res.raise_for_status()
 
     @contextmanager
     def _write(self, url, mode):
@@ -120,10 +227,15 @@ class RestIO(FileLikeIO):
         # the file that FileLike writes into is 'closed'.
         if '+' not in mode:
             mode += '+'
-        with TemporaryFile(mode=mode) as fh:
+        with SpooledTemporaryFile(
+                max_size=self.spool_max_size, mode=mode) as fh:
             yield fh
+            size = fh.tell()
             fh.seek(0)
-            res = self.session.put(url, data=fh)
+            # requests would ask the file for its fileno(), which
+            # moves it to disk, so we send what's in memory as is:
+            data = fh.read() if size <= self.spool_max_size else fh
+            res = self.session.put(url, data=data)
         res.raise_for_status()
 
     def open(self, path, mode='r'):
@@ -136,6 +248,8 @@ class RestIO(FileLikeIO):
                 reader = codecs.getreader(res.encoding or 'utf-8')
                 return reader(res.raw)
         elif mode == 'wb':
+            if self.stream_uploads:
+                return self._stream(path)
             return self._write(path, mode=mode)
         raise NotImplementedError("filemode: %s" % (mode,))
 
@@ -146,6 +260,15 @@ class RestIO(FileLikeIO):
         res.raise_for_status()
         return True
 
+    def stamp(self, path):
+        res = self.session.head(path)
+        if res.status_code == 404:
+            return False
+        res.raise_for_status()
+        return (res.headers.get('ETag') or
+                res.headers.get('Last-Modified') or
+                True)
+
     def remove(self, path):
         res = self.session.delete(path)
         res.raise_for_status()
@@ -160,7 +283,7 @@ class FileLike(ModelPersister):
     """
     upgrade_steps = UpgradeSteps()
 
-    def __init__(self, path, io):
+    def __init__(self, path, io, compresslevel=GZIP_COMPRESSLEVEL):
         """
         :param str path:
           The *path* template that I will use to store models,
@@ -168,6 +291,11 @@ class FileLike(ModelPersister):
 
         :param FileLikeIO io:
           Used to access low level file handle operations.
+
+        :param int compresslevel:
+          The gzip compression level, from 0 to 9, used when writing
+          models.  Higher levels make for slightly smaller files at
+          the cost of much slower writes.
         """
         if '{version}' not in path:
             raise ValueError(
@@ -176,6 +304,8 @@ class FileLike(ModelPersister):
                 )
         self.path = path
         self.io = io
+        self.compresslevel = compresslevel
+        self._md_cache = None, None
 
     def read(self, version=None):
         use_active_model = version is None
@@ -195,7 +325,7 @@ class FileLike(ModelPersister):
                 raise LookupError("No such version: {}".format(version))
 
         with self.io.open(fname, 'rb') as fh:
-            with gzip.open(fh, 'rb') as f:
+            with _gzip().open(fh, 'rb') as f:
                 model = pickle.load(f)
 
         attachments = annotate(model).get('__attachments__', [])
@@ -210,7 +340,8 @@ class FileLike(ModelPersister):
 
     def write(self, model):
         last_version = 0
-        li = self.list_models()
+        md = self._read_md()
+        li = md['models']
         if li:
             last_version = li[-1]['version']
 
@@ -231,8 +362,9 @@ class FileLike(ModelPersister):
 
         fname = self.path.format(version=version) + '.pkl.gz'
         with self.io.open(fname, 'wb') as fh:
-            with gzip.open(fh, 'wb') as f:
-                pickle.dump(model, f)
+            gzip_ = _gzip(self.compresslevel)
+            with gzip_.open(fh, 'wb', compresslevel=self.compresslevel) as f:
+                pickle.dump(model, f, protocol=PICKLE_PROTOCOL)
 
         if attachments:
             for key, data in attachments.items():
@@ -255,7 +387,7 @@ class FileLike(ModelPersister):
         versions = [m['version'] for m in md['models']]
         if int(version) not in versions:
             raise LookupError("No such version: {}".format(version))
-        self._update_md({'properties': md['properties']})
+        self._update_md({'properties': md['properties']}, base=md)
 
     def delete(self, version):
         version = int(version)
@@ -286,14 +418,32 @@ class FileLike(ModelPersister):
             )
 
     def _read_md(self):
-        if self.io.exists(self._md_filename):
-            with self.io.open(self._md_filename, 'r') as f:
+        # Keep the metadata file's contents around for as long as its
+        # stamp says it hasn't changed.  Callers modify what we
+        # return, so we parse it again every time:
+        fname = self._md_filename
+        stamp = self.io.stamp(fname)
+        if stamp is None:
+            stamp = self.io.exists(fname)
+        if stamp is False:
+            return {'models': [], 'properties': {'db-version': __version__}}
+        if stamp is True:
+            with self.io.open(fname, 'r') as f:
                 return json.load(f)
-        return {'models': [], 'properties': {'db-version': __version__}}
 
-    def _update_md(self, data):
-        data2 = self._read_md()
+        cached_stamp, text = self._md_cache
+        if stamp != cached_stamp:
+            with self.io.open(fname, 'r') as f:
+                text = f.read()
+            self._md_cache = stamp, text
+        return _json_loads(text)
+
+    def _update_md(self, data, base=None):
+        # Callers that have just read the metadata pass it as *base*,
+        # so that we don't have to read it again:
+        data2 = base if base is not None else self._read_md()
         data2.update(data)
+        self._md_cache = None, None
         with self.io.open(self._md_filename, 'wb') as f:
             bytes = json.dumps(data2, indent=4).encode('utf-8')
             f.write(bytes)
@@ -308,7 +458,7 @@ class FileLike(ModelPersister):
         self.upgrade_steps.run(self, from_version, to_version)
         md = self._read_md()
         md['properties']['db-version'] = to_version
-        self._update_md(md)
+        self._update_md(md, base=md)
 
     @upgrade_steps.add('1.0')
     def _upgrade_1_0(self):
@@ -326,6 +476,7 @@ class FileLike(ModelPersister):
         if active_model is not None:
             new_md['properties']['active-model'] = str(active_model)
 
+        self._md_cache = None, None
         with self.io.open(self._md_filename, 'w') as f:
             json.dump(new_md, f, indent=4)
 
@@ -334,18 +485,165 @@ class File(FileLike):
     """A :class:`~palladium.interfaces.ModelPersister` that pickles models
     onto the file system, into a given directory.
     """
-    def __init__(self, path):
+    def __init__(self, path, compresslevel=GZIP_COMPRESSLEVEL):
         """
         :param str path:
           The *path* template that I will use to store models,
           e.g. ``/path/to/model-{version}``.
+
+        :param int compresslevel:
+          The gzip compression level, from 0 to 9, used when writing
+          models.  Higher levels make for slightly smaller files at
+          the cost of much slower writes.
         """
-        super().__init__(path, FileIO())
+        super().__init__(path, FileIO(), compresslevel=compresslevel)
 
 
 class Rest(FileLike):
-    def __init__(self, url, auth):
-        super().__init__(url, RestIO(auth))
+    def __init__(self, url, auth, compresslevel=GZIP_COMPRESSLEVEL,
+                 spool_max_size=SPOOL_MAX_SIZE, stream_uploads=False):
+        """
+        :param str url:
+          The *url* template that I will use to store models,
+          e.g. ``https://repo.example.com/models/model-{version}``.
+
+        :param tuple auth:
+          The ``(user, password)`` to authenticate with.
+
+        :param int compresslevel:
+          The gzip compression level, from 0 to 9, used when writing
+          models.
+
+        :param int spool_max_size:
+          Models up to this many bytes are kept in memory before
+          they're uploaded, larger ones are written to a temporary
+          file first.
+
+        :param bool stream_uploads:
+          If true, models are uploaded while they're being written,
+          with chunked transfer encoding, and without buffering them
+          first.  The server must accept uploads without a
+          ``Content-Length``.
+        """
+        super().__init__(
+            url,
+            RestIO(auth, spool_max_size=spool_max_size,
+                   stream_uploads=stream_uploads),
+            compresslevel=compresslevel,
+            )
+
+
+class _ChunkWriter:
+    """A write-only file object that collects what's written to it in
+    ``bytes`` chunks of *chunk_size* bytes, without ever holding the
+    data in one contiguous buffer.
+    """
+    def __init__(self, chunk_size):
+        self.chunk_size = chunk_size
+        self.chunks = []
+        self._pieces = []
+        self._size = 0
+
+    def write(self, data):
+        # We hold on to what's written, and join it into a chunk with
+        # a single copy once the chunk is full:
+        if not isinstance(data, bytes):
+            data = bytes(data)
+        view = memoryview(data)
+        while view:
+            piece = view[:self.chunk_size - self._size]
+            view = view[len(piece):]
+            self._pieces.append(piece)
+            self._size += len(piece)
+            if self._size == self.chunk_size:
+                self._finish_chunk()
+        return len(data)
+
+    def _finish_chunk(self):
+        pieces = self._pieces
+        if len(pieces) == 1 and len(pieces[0]) == len(pieces[0].obj):
+            self.chunks.append(pieces[0].obj)
+        else:
+            self.chunks.append(b''.join(pieces))
+        self._pieces, self._size = [], 0
+
+    def flush(self):
+        pass
+
+    def close(self):
+        if self._pieces:
+            self._finish_chunk()
+
+
+def _iter_queue(items):
+    """Yield the items from the queue *items* until there's a *None*.
+    Exceptions found in the queue are raised.
+    """
+    while True:
+        item = items.get()
+        if item is None:
+            return
+        if isinstance(item, BaseException):
+            raise item
+        yield item
+
+
+def _put(items, item, stopped):
+    """Put *item* into the queue *items*, unless the callable
+    *stopped* says that no one's taking items from it any more.
+    Return whether *item* was put.
+    """
+    while not stopped():
+        try:
+            items.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+class _ChunkStream(_ChunkWriter):
+    """A :class:`_ChunkWriter` that puts each chunk into a *queue*
+    as soon as it's full, for an upload running in *future* to pick
+    up.
+    """
+    def __init__(self, chunk_size, queue, future):
+        super().__init__(chunk_size)
+        self.queue = queue
+        self.future = future
+
+    def _finish_chunk(self):
+        super()._finish_chunk()
+        self.put(self.chunks.pop())
+
+    def put(self, item):
+        # Don't wait for an upload that's failed or finished early:
+        if not _put(self.queue, item, self.future.done):
+            self.future.result()
+            raise IOError("Upload finished before all data was sent")
+
+
+class _ChunkReader(io.RawIOBase):
+    """A read-only file object that reads from an iterable of byte
+    chunks, pulling in the next chunk only when it's needed.
+    """
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._chunk = memoryview(b'')
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._chunk:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._chunk = memoryview(chunk).cast('B')
+        size = min(len(buffer), len(self._chunk))
+        buffer[:size] = self._chunk[:size]
+        self._chunk = self._chunk[size:]
+        return size
 
 
 class Database(ModelPersister):
@@ -357,7 +655,8 @@ class Database(ModelPersister):
 
     def __init__(
             self, url, poolclass=None, chunk_size=1024 ** 2 * 100,
-            table_postfix=''):
+            table_postfix='', engine_kwargs=None,
+            compresslevel=GZIP_COMPRESSLEVEL):
         """
         :param str url:
           The database *url* that'll be used to make a connection.
@@ -366,7 +665,12 @@ class Database(ModelPersister):
 
         :param sqlalchemy.pool.Pool poolclass:
           A class specifying DB connection behavior of the engine. If set to
-          None, the NullPool will be used.
+          None, the NullPool will be used.  May also be given as a
+          dotted name, e.g. ``'sqlalchemy.pool.QueuePool'``.  When a
+          pool other than the NullPool is used, connections are
+          checked with ``pool_pre_ping`` before they're handed out,
+          and SQLite connections are allowed to be shared between
+          threads.
 
         :param int chunk_size:
           The pickled contents of the model are stored inside the
@@ -376,12 +680,31 @@ class Database(ModelPersister):
         :param str table_postfix:
           If *table_postfix* is provided, I will append it to the
           table name of all tables used in this instance.
+
+        :param dict engine_kwargs:
+          Additional keyword arguments passed on to
+          :func:`sqlalchemy.create_engine`, e.g. ``pool_size`` or
+          ``pool_recycle``.
+
+        :param int compresslevel:
+          The gzip compression level, from 0 to 9, used when writing
+          models.  Higher levels make for slightly smaller files at
+          the cost of much slower writes.
         """
         if not poolclass:
             poolclass = NullPool
-        engine = create_engine(url, poolclass=poolclass)
+        elif isinstance(poolclass, str):
+            poolclass = resolve_dotted_name(poolclass)
+        engine_kwargs = dict(engine_kwargs or {})
+        if poolclass is not NullPool:
+            engine_kwargs.setdefault('pool_pre_ping', True)
+            if url.startswith('sqlite'):
+                engine_kwargs.setdefault(
+                    'connect_args', {'check_same_thread': False})
+        engine = create_engine(url, poolclass=poolclass, **engine_kwargs)
         self.engine = engine
         self.chunk_size = chunk_size
+        self.compresslevel = compresslevel
         self.table_postfix = table_postfix
         self.write_lock = Lock()
         orms = self.create_orm_classes()
@@ -391,6 +714,10 @@ class Database(ModelPersister):
         metadata = self.DBModel.metadata
         metadata.bind = engine
         metadata.create_all()
+        # Chunk tables created by older versions don't have the index
+        # on model_version yet:
+        for index in self.DBModelChunk.__table__.indexes:
+            index.create(bind=engine, checkfirst=True)
         self.session = scoped_session(sessionmaker(bind=engine))
         self._initialize_properties()
 
@@ -440,7 +767,9 @@ class Database(ModelPersister):
             __tablename__ = self._table_postfix('model_chunks')
             id = Column(Integer, primary_key=True)
             model_version = Column(
-                ForeignKey('{}.version'.format(self._table_postfix('models'))))
+                ForeignKey('{}.version'.format(self._table_postfix('models'))),
+                index=True,
+                )
             blob = Column(LargeBinary, nullable=False)
         return DBModelChunk
 
@@ -448,27 +777,54 @@ class Database(ModelPersister):
         use_active_model = version is None
 
         with session_scope(self.session) as session:
-            query = session.query(self.DBModel)
+            query = session.query(self.DBModel.version)
             if not version:
                 version = self._active_version
             dbmodel = query.filter_by(version=version).first()
 
-            if dbmodel is not None:
-                query2 = session.query(self.DBModelChunk).filter_by(
-                    model_version=dbmodel.version
-                    ).order_by('id').yield_per(4)
-                fileobj = io.BytesIO()
-                for chunk in query2:
-                    fileobj.write(chunk.blob)
-                fileobj.seek(0)
-                return pickle.load(gzip.GzipFile(fileobj=fileobj, mode='rb'))
-
-        if use_active_model and dbmodel is None and version is not None:
+        # The chunks are fetched with a session and connection of
+        # their own, so we don't hold on to ours while reading them:
+        if dbmodel is not None:
+            return self._read_chunks(dbmodel.version)
+
+        if use_active_model and version is not None:
             raise LookupError(
                 "Activated model not available. Maybe it was deleted.")
 
         raise LookupError("No model available")
 
+    def _read_chunks(self, version):
+        # Fetch the chunks in another thread, with a session of its
+        # own, while we decompress and unpickle what's arrived so far.
+        # At most two chunks wait in the queue:
+        chunks = queue.Queue(maxsize=2)
+        stopped = Event()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            executor.submit(
+                self._fetch_chunks, version, chunks, stopped.is_set)
+            try:
+                fileobj = io.BufferedReader(_ChunkReader(_iter_queue(chunks)))
+                return pickle.load(
+                    _gzip().GzipFile(fileobj=fileobj, mode='rb'))
+            finally:
+                stopped.set()
+
+    def _fetch_chunks(self, version, chunks, stopped):
+        try:
+            with session_scope(self.session) as session:
+                # Query the blob column only, which gives us plain rows
+                # instead of DBModelChunk objects in the session:
+                query = session.query(self.DBModelChunk.blob).filter_by(
+                    model_version=version,
+                    ).order_by(self.DBModelChunk.id).yield_per(4)
+                for blob, in query:
+                    if not _put(chunks, blob, stopped):
+                        return
+        except BaseException as exc:
+            _put(chunks, exc, stopped)
+        else:
+            _put(chunks, None, stopped)
+
     def write(self, model):
         with self.write_lock:
             return self._write(model)
@@ -481,20 +837,27 @@ class Database(ModelPersister):
 
         annotate(model, {'version': version})
 
-        fileobj = io.BytesIO()
-        pickle.dump(model, gzip.GzipFile(fileobj=fileobj, mode='wb'))
-        data = fileobj.getbuffer()
-        chunks = [data[i:i + self.chunk_size]
-                  for i in range(0, len(data), self.chunk_size)]
+        fileobj = _ChunkWriter(self.chunk_size)
+        gzip_ = _gzip(self.compresslevel)
+        with gzip_.GzipFile(fileobj=fileobj, mode='wb',
+                            compresslevel=self.compresslevel) as f:
+            pickle.dump(model, f, protocol=PICKLE_PROTOCOL)
+        fileobj.close()
 
         dbmodel = self.DBModel(
             version=version,
-            chunks=[self.DBModelChunk(blob=chunk) for chunk in chunks],
             metadata_=json.dumps(model.__metadata__),
             )
 
         with session_scope(self.session) as session:
             session.add(dbmodel)
+            session.flush()
+            # Insert the chunks in one executemany, without creating
+            # an ORM object for each of them:
+            session.execute(self.DBModelChunk.__table__.insert(), [
+                {'model_version': version, 'blob': chunk}
+                for chunk in fileobj.chunks
+                ])
 
         return version
 
@@ -512,7 +875,7 @@ class Database(ModelPersister):
     def list_models(self):
         with session_scope(self.session) as session:
             results = session.query(self.DBModel.metadata_).all()
-        infos = [json.loads(res[0]) for res in results]
+        infos = [_json_loads(res[0]) for res in results]
         return sorted(infos, key=lambda x: x['version'])
 
     def list_properties(self):
@@ -569,14 +932,17 @@ class DatabaseCLOB(Database):
     class BytesToBase64Type(TypeDecorator):
         impl = CLOB
 
+        # binascii reads memoryviews and ASCII strings as they are,
+        # which saves base64's extra copies of every chunk:
         def process_bind_param(self, value, dialect):
             if value is not None:
-                value = base64.b64encode(bytes(value)).decode('ascii')
+                value = binascii.b2a_base64(
+                    value, newline=False).decode('ascii')
             return value
 
         def process_result_value(self, value, dialect):
             if value is not None:
-                value = base64.b64decode(value.encode('ascii'))
+                value = binascii.a2b_base64(value)
             return value
 
     def DBModelChunkClass(self, Base):
@@ -584,11 +950,84 @@ class DatabaseCLOB(Database):
             __tablename__ = self._table_postfix('model_chunks')
             id = Column(Integer, primary_key=True)
             model_version = Column(
-                ForeignKey('{}.version'.format(self._table_postfix('models'))))
+                ForeignKey('{}.version'.format(self._table_postfix('models'))),
+                index=True,
+                )
             blob = Column(self.BytesToBase64Type(String()), nullable=False)
         return DBModelChunk
 
 
+def _shared_memory(name, create=False, size=0):
+    """Create or attach to the shared memory segment *name*, without
+    the resource tracker removing the segment when this process
+    exits.  :class:`CachedUpdatePersister` takes care of that.
+    """
+    from multiprocessing import shared_memory
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(
+            name=name, create=create, size=size, track=False)
+
+    from multiprocessing import resource_tracker
+    shm = shared_memory.SharedMemory(name=name, create=create, size=size)
+    resource_tracker.unregister(shm._name, 'shared_memory')
+    return shm
+
+
+def _unlink_shared_memory(shm):
+    if sys.version_info < (3, 13):
+        # unlink() unregisters the segment from the resource tracker:
+        from multiprocessing import resource_tracker
+        resource_tracker.register(shm._name, 'shared_memory')
+    shm.unlink()
+
+
+def _dump_shared_memory(obj, name, alignment=64):
+    """Pickle *obj* into a new shared memory segment called *name*.
+
+    The segment starts with a ready flag, which is set once all data
+    has been written, followed by the sizes of the pickle and of its
+    out-of-band buffers, the pickle itself, and the buffers.
+    """
+    buffers = []
+    payload = pickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+    raws = [buffer.raw() for buffer in buffers]
+
+    offset = 8 + 16 + 16 * len(raws) + len(payload)
+    table = []
+    for raw in raws:
+        offset += -offset % alignment
+        table.extend([offset, raw.nbytes])
+        offset += raw.nbytes
+
+    shm = _shared_memory(name, create=True, size=offset)
+    struct.pack_into(
+        '<QQ{}Q'.format(len(table)), shm.buf, 8,
+        len(payload), len(raws), *table)
+    start = 8 + 16 + 16 * len(raws)
+    shm.buf[start:start + len(payload)] = payload
+    for (start, length), raw in zip(zip(table[::2], table[1::2]), raws):
+        shm.buf[start:start + length] = raw
+    shm.buf[0] = 1
+    return shm
+
+
+def _load_shared_memory(shm):
+    """Unpickle the object stored by :func:`_dump_shared_memory` in
+    *shm*.  NumPy arrays in the object will use the shared memory
+    segment's memory instead of holding a copy of their data, and
+    are read-only, since other processes use the same memory.
+    """
+    view = shm.buf
+    size, nbuffers = struct.unpack_from('<QQ', view, 8)
+    table = struct.unpack_from('<{}Q'.format(2 * nbuffers), view, 24)
+    buffers = [
+        view[start:start + length].toreadonly()
+        for start, length in zip(table[::2], table[1::2])
+        ]
+    start = 8 + 16 + 16 * nbuffers
+    return pickle.loads(view[start:start + size], buffers=buffers)
+
+
 class CachedUpdatePersister(ModelPersister):
     """A :class:`~palladium.interfaces.ModelPersister` that serves as a
     caching decorator around another `~palladium.interfaces.ModelPersister`
@@ -608,16 +1047,27 @@ class CachedUpdatePersister(ModelPersister):
     will call once and remember the return value of the underlying
     :class:`~palladium.interfaces.ModelPersister`'s ``read`` method during
     initialization.
+
+    When running several worker processes on the same machine, the
+    *shared_memory* option allows workers to share the active model
+    through a shared memory segment instead of each loading it from
+    the underlying :class:`~palladium.interfaces.ModelPersister`.
     """
 
     cache = process_store
     __pld_config_key__ = 'cachedupdatepersister_default'
     _loaded_version = None
+    _shm = None
+    _shm_owner = False
+    _retired_shms = ()
+    _shm_atexit = False
 
     def __init__(self,
                  impl,
                  update_cache_rrule=None,
                  check_version=True,
+                 shared_memory=None,
+                 metadata_ttl=None,
                  ):
         """
         :param ModelPersister impl:
@@ -633,10 +1083,31 @@ class CachedUpdatePersister(ModelPersister):
           If set to `True`, I will perform a check and only load a new
           model from the storage if my cached version differs from
           what's the current active version.
+
+        :param str shared_memory:
+          If set, the active model is pickled into a shared memory
+          segment called ``pld-<shared_memory>-<version>`` by the
+          first process that loads it.  Other processes will unpickle
+          the model from there, with the data of NumPy arrays
+          remaining in shared memory, so it's not duplicated across
+          processes.  Use a name that's unique to your service on
+          this machine.  Models must not be modified after loading
+          when this option is used.
+
+        :param float metadata_ttl:
+          If set, the results of :meth:`list_models` and
+          :meth:`list_properties` are remembered for this many
+          seconds, e.g. to answer frequent ``/list`` requests without
+          asking the underlying persister each time.  The version
+          check in :meth:`update_cache` always asks the underlying
+          persister, and refreshes what's remembered.
         """
         self.impl = impl
         self.update_cache_rrule = update_cache_rrule
         self.check_version = check_version
+        self.shared_memory = shared_memory
+        self.metadata_ttl = metadata_ttl
+        self._metadata_cache = {}
 
     def initialize_component(self, config):
         self.use_cache = config.get('__mode__') != 'fit'
@@ -665,12 +1136,16 @@ class CachedUpdatePersister(ModelPersister):
         active_version = None
 
         if self.check_version:
-            active_version = self.list_properties().get('active-model')
+            active_version = self._metadata(
+                'list_properties', refresh=True).get('active-model')
             if self._loaded_version == (active_version, args, kwargs):
                 return
 
         try:
-            model = self.impl.read(*args, **kwargs)
+            if self.shared_memory and not (args or kwargs):
+                model = self._read_shared_memory(active_version)
+            else:
+                model = self.impl.read(*args, **kwargs)
         except LookupError as ex:
             logging.exception("Cannot find model version")
             model = None
@@ -682,20 +1157,94 @@ class CachedUpdatePersister(ModelPersister):
 
             return model
 
+    def _read_shared_memory(self, version):
+        if version is None:
+            version = self.list_properties().get('active-model')
+            if version is None:
+                return self.impl.read()
+        name = 'pld-{}-{}'.format(self.shared_memory, version)
+
+        try:
+            shm = _shared_memory(name)
+        except FileNotFoundError:
+            shm = None
+        if shm is not None:
+            if shm.buf[0]:
+                model = _load_shared_memory(shm)
+                self._replace_shm(shm, owner=False)
+                return model
+            # Another process is still writing the segment:
+            shm.close()
+            return self.impl.read(version=version)
+
+        model = self.impl.read(version=version)
+        try:
+            shm = _dump_shared_memory(model, name)
+        except FileExistsError:
+            return model
+        self._replace_shm(shm, owner=True)
+        return model
+
+    def _replace_shm(self, shm, owner):
+        if self._shm is not None:
+            if self._shm_owner:
+                # Processes that still use the old segment keep it
+                # mapped; this only removes its name:
+                _unlink_shared_memory(self._shm)
+            self._retired_shms = list(self._retired_shms) + [self._shm]
+        self._shm, self._shm_owner = shm, owner
+        if owner and not self._shm_atexit:
+            atexit.register(self._unlink_shm)
+            self._shm_atexit = True
+
+        # Segments can only be closed once the models that use their
+        # memory are gone:
+        retired = []
+        for old_shm in self._retired_shms:
+            try:
+                old_shm.close()
+            except BufferError:
+                retired.append(old_shm)
+        self._retired_shms = retired
+
+    def _unlink_shm(self):
+        if self._shm is not None and self._shm_owner:
+            try:
+                _unlink_shared_memory(self._shm)
+            except FileNotFoundError:
+                pass
+            self._shm_owner = False
+
     def write(self, model):
-        return self.impl.write(model)
+        result = self.impl.write(model)
+        self._metadata_cache = {}
+        return result
 
     def list_models(self):
-        return self.impl.list_models()
+        return self._metadata('list_models')
 
     def list_properties(self):
-        return self.impl.list_properties()
+        return self._metadata('list_properties')
+
+    def _metadata(self, name, refresh=False):
+        if not self.metadata_ttl:
+            return getattr(self.impl, name)()
+        now = monotonic()
+        entry = self._metadata_cache.get(name)
+        if refresh or entry is None or now - entry[0] >= self.metadata_ttl:
+            entry = self._metadata_cache[name] = (
+                now, getattr(self.impl, name)())
+        return copy.deepcopy(entry[1])
 
     def activate(self, version):
-        return self.impl.activate(version)
+        result = self.impl.activate(version)
+        self._metadata_cache = {}
+        return result
 
     def delete(self, version):
-        return self.impl.delete(version)
+        result = self.impl.delete(version)
+        self._metadata_cache = {}
+        return result
 
     def upgrade(self, from_version=None, to_version=__version__):
         return self.impl.upgrade(from_version, to_version)
@@ -744,6 +1293,10 @@ class S3(FileLike):
 
     path : str
       The path to the bucket and file, e.g. ``'my-bucket/my-folder/my-file'``.
+
+    compresslevel : int
+      The gzip compression level, from 0 to 9, used when writing
+      models.
     """
-    def __init__(self, path):
-        super().__init__(path, S3IO())
+    def __init__(self, path, compresslevel=GZIP_COMPRESSLEVEL):
+        super().__init__(path, S3IO(), compresslevel=compresslevel)
@@ -1,7 +1,13 @@
 """HTTP API implementation.
 """
 
+import builtins
+from concurrent.futures import Future
+import math
+import queue
 import sys
+import threading
+from time import time
 
 from docopt import docopt
 from flask import Flask
@@ -26,16 +32,64 @@ from .util import process_store
 from .util import run_job
 from .util import resolve_dotted_name
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
 app = Flask(__name__)
 
+# NumPy dtypes that orjson encodes the same way as their tolist(),
+# except for non-finite floats (see _all_finite):
+_orjson_dtypes = frozenset(map(np.dtype, [
+    'bool', 'int8', 'int16', 'int32', 'int64',
+    'uint8', 'uint16', 'uint32', 'uint64', 'float64',
+    ]))
+
+
+def _array_tolist(obj):
+    if isinstance(obj, (np.ndarray, np.generic)):
+        return obj.tolist()
+    raise TypeError("{!r} is not JSON serializable".format(obj))
+
+
+def _all_finite(obj):
+    """Return whether there are no NaN or infinite floats in *obj*.
+    orjson encodes those as null, where ujson writes NaN and Infinity.
+    """
+    if isinstance(obj, (float, np.floating)):
+        return math.isfinite(obj)
+    if isinstance(obj, np.ndarray):
+        return obj.dtype.kind != 'f' or bool(np.isfinite(obj).all())
+    if isinstance(obj, dict):
+        return all(_all_finite(value) for value in obj.values())
+    if isinstance(obj, (builtins.list, tuple)):  # list() is a view here
+        return all(_all_finite(value) for value in obj)
+    return True
+
+
+def _encode_json(obj):
+    if orjson is not None and _all_finite(obj):
+        try:
+            return orjson.dumps(obj, option=(
+                orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS))
+        except orjson.JSONEncodeError:
+            # Some values that ujson knows how to encode, like very
+            # large ints, aren't supported by orjson:
+            pass
+    return ujson.encode(obj, ensure_ascii=False, default=_array_tolist)
+
 
 def make_ujson_response(obj, status_code=200):
     """Encodes the given *obj* to json and wraps it in a response.
 
+    Uses :mod:`orjson` if it's installed, which is faster, and can
+    also encode NumPy arrays, and :mod:`ujson` otherwise.
+
     :return:
       A Flask response.
     """
-    json_encoded = ujson.encode(obj, ensure_ascii=False)
+    json_encoded = _encode_json(obj)
     resp = make_response(json_encoded)
     resp.mimetype = 'application/json'
     resp.content_type = 'application/json; charset=utf-8'
@@ -66,6 +120,8 @@ class PredictService:
         decorator_list_name='predict_decorators',
         predict_proba=False,
         unwrap_sample=False,
+        batch_size=None,
+        batch_timeout_ms=10,
         **kwargs
     ):
         """
@@ -97,6 +153,17 @@ class PredictService:
           sometimes expect the input to be a 1d array of strings
           rather than a 2d array.  Setting *unwrap_sample* to true
           will use this representation.
+
+        :param batch_size:
+          If set, concurrent requests are collected into a queue and
+          passed to the model in a single call to ``predict`` (or
+          ``predict_proba``) with up to *batch_size* samples.  The
+          default of ``None`` disables batching.
+
+        :param batch_timeout_ms:
+          The maximum time in milliseconds to wait for more requests
+          to arrive before a batch that hasn't reached *batch_size*
+          is passed on to the model.  Only used with *batch_size*.
         """
         self.mapping = mapping
         self.params = params
@@ -104,7 +171,16 @@ class PredictService:
         self.decorator_list_name = decorator_list_name
         self.predict_proba = predict_proba
         self.unwrap_sample = unwrap_sample
+        self.batch_size = batch_size
+        self.batch_timeout_ms = batch_timeout_ms
         vars(self).update(kwargs)
+        self._mapping_types = [
+            (key, self.types[type_name]) for key, type_name in mapping]
+        self._params_types = [
+            (key, self.types[type_name]) for key, type_name in params]
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
 
     def initialize_component(self, config):
         create_predict_function(
@@ -122,14 +198,13 @@ class PredictService:
             samples = np.array([self.sample_from_data(model, request.args)])
         else:
             single = False
-            samples = []
-
-            for data in request.json:
-                samples.append(self.sample_from_data(model, data))
-            samples = np.array(samples)
+            samples = self.samples_from_data(model, request.json)
 
         params = self.params_from_data(model, request.args)
-        y_pred = self.predict(model, samples, **params)
+        if self.batch_size:
+            y_pred = self.predict_batched(model, samples, **params)
+        else:
+            y_pred = self.predict(model, samples, **params)
         return self.response_from_prediction(y_pred, single=single)
 
     def sample_from_data(self, model, data):
@@ -141,16 +216,45 @@ class PredictService:
           A dict-like with the sample's data, typically retrieved from
           ``request.args`` or similar.
         """
-        values = []
-        for key, type_name in self.mapping:
-            value_type = self.types[type_name]
-            values.append(value_type(data[key]))
+        values = [
+            value_type(data[key]) for key, value_type in self._mapping_types]
         if self.unwrap_sample:
             assert len(values) == 1
             return np.array(values[0])
         else:
             return np.array(values, dtype=object)
 
+    def samples_from_data(self, model, data_list):
+        """Convert a list of incoming sample *data* into a numpy array
+        with one row per sample.
+
+        The result is the same as stacking the results of
+        :meth:`sample_from_data` for each item, but the array is
+        allocated once and filled column by column.  If you override
+        :meth:`sample_from_data`, this method will use your version.
+
+        :param model:
+          The :class:`~Model` instance to use for making predictions.
+        :param data_list:
+          A list of dict-likes with the samples' data, typically
+          retrieved from ``request.json``.
+        """
+        if (type(self).sample_from_data is not
+                PredictService.sample_from_data):
+            return np.array([
+                self.sample_from_data(model, data) for data in data_list])
+
+        if self.unwrap_sample:
+            assert len(self._mapping_types) == 1
+            [(key, value_type)] = self._mapping_types
+            return np.array([value_type(data[key]) for data in data_list])
+
+        samples = np.empty(
+            (len(data_list), len(self._mapping_types)), dtype=object)
+        for index, (key, value_type) in enumerate(self._mapping_types):
+            samples[:, index] = [value_type(data[key]) for data in data_list]
+        return samples
+
     def params_from_data(self, model, data):
         """Retrieve additional parameters (keyword arguments) for
         ``model.predict`` from request *data*.
@@ -162,8 +266,7 @@ class PredictService:
           from ``request.args`` or similar.
         """
         params = {}
-        for key, type_name in self.params:
-            value_type = self.types[type_name]
+        for key, value_type in self._params_types:
             if key in data:
                 params[key] = value_type(data[key])
             elif hasattr(model, key):
@@ -176,11 +279,75 @@ class PredictService:
         else:
             return model.predict(sample, **kwargs)
 
+    def predict_batched(self, model, samples, **kwargs):
+        """Put *samples* on the batch queue and wait for the worker
+        thread to deliver the corresponding predictions.
+        """
+        if self._worker is None:
+            with self._worker_lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(
+                        target=self._drain_loop, daemon=True)
+                    self._worker.start()
+        future = Future()
+        self._queue.put((model, samples, kwargs, future))
+        return future.result()
+
+    def _drain_loop(self):
+        while True:
+            items = [self._queue.get()]
+            size = len(items[0][1])
+            deadline = time() + self.batch_timeout_ms / 1000
+            while size < self.batch_size:
+                timeout = deadline - time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                items.append(item)
+                size += len(item[1])
+            self._dispatch(items)
+
+    def _dispatch(self, items):
+        # Only requests that use the same model and the same predict
+        # parameters can share a call to predict:
+        groups = []
+        for model, samples, kwargs, future in items:
+            for group in groups:
+                if group[0] is model and group[1] == kwargs:
+                    group[2].append((samples, future))
+                    break
+            else:
+                groups.append((model, kwargs, [(samples, future)]))
+
+        for model, kwargs, entries in groups:
+            try:
+                y_pred = self.predict(
+                    model,
+                    np.concatenate([samples for samples, _ in entries]),
+                    **kwargs
+                    )
+            except Exception as exc:
+                for _, future in entries:
+                    future.set_exception(exc)
+                continue
+            start = 0
+            for samples, future in entries:
+                future.set_result(y_pred[start:start + len(samples)])
+                start += len(samples)
+
     def response_from_prediction(self, y_pred, single=True):
         """Turns a model's prediction in *y_pred* into a JSON
         response.
         """
-        result = y_pred.tolist()
+        if (orjson is not None and isinstance(y_pred, np.ndarray) and
+                y_pred.dtype in _orjson_dtypes):
+            # orjson encodes these arrays without going through lists:
+            result = np.ascontiguousarray(y_pred)
+        else:
+            result = y_pred.tolist()
         if single:
             result = result[0]
         response = {
@@ -27,6 +27,7 @@ def ObjectMixin(monkeypatch):
     r['myfunc'] = Mock()
     r['predict'] = Mock()
     monkeypatch.setattr(ObjectMixin, 'r', r)
+    monkeypatch.setattr(ObjectMixin, '_sourced', set())
     return ObjectMixin
 
 
@@ -44,6 +45,43 @@ class TestDatasetLoader:
         dloader.r.source.assert_called_with('myscript')
         dloader.r['myfunc'].assert_called_with(some='kwarg')
 
+    def test_source_once(self, DatasetLoader, tmpdir):
+        script = tmpdir.join('myscript.R')
+        script.write('myfunc <- function() {}')
+        DatasetLoader(str(script), 'myfunc')
+        DatasetLoader(os.path.join(str(tmpdir), '.', 'myscript.R'), 'myfunc')
+        assert DatasetLoader.r.source.call_count == 1
+
+        # Changed scripts are sourced again:
+        os.utime(str(script), (0, 0))
+        DatasetLoader(str(script), 'myfunc')
+        assert DatasetLoader.r.source.call_count == 2
+
+
+class TestRWorker:
+    @pytest.fixture
+    def worker(self):
+        from palladium.R import _RWorker
+        return _RWorker()
+
+    def test_single_thread(self, worker):
+        from multiprocessing.pool import ThreadPool
+        import threading
+
+        result = ThreadPool(4).map(
+            lambda x: worker(lambda: (x, threading.get_ident())),
+            range(20))
+        assert [x for x, ident in result] == list(range(20))
+        assert {ident for x, ident in result} == {worker.thread.ident}
+
+    def test_reentrant(self, worker):
+        assert worker(lambda: worker(lambda: 42)) == 42
+
+    def test_exception(self, worker):
+        with pytest.raises(ZeroDivisionError):
+            worker(lambda: 1 / 0)
+        assert worker(lambda: 1) == 1
+
 
 class TestAbstractModel:
     @pytest.fixture
@@ -81,6 +119,47 @@ class TestAbstractModel:
         assert (ri2py(funcargs[0][1]) == y).all()
         assert funcargs[1]['some'] == 'kwarg'
 
+    def test_cache_conversions(self, Model, data, monkeypatch):
+        from palladium.R import _conversion_cache
+        X, y = data
+        calls = []
+
+        def from_python(obj):
+            calls.append(id(obj))
+            return object()
+
+        monkeypatch.setattr(Model, '_from_python', staticmethod(from_python))
+        model = Model(scriptname='myscript', funcname='myfunc',
+                      cache_conversions=True)
+        model.fit(X, y)
+        model.fit(X, y)
+        assert len(calls) == 2
+        first = model.r['myfunc'].call_args_list[0][0]
+        second = model.r['myfunc'].call_args_list[1][0]
+        assert first[0] is second[0]
+        assert id(X) in _conversion_cache
+
+        X2 = numpy.array([[1.0, 2.0]])
+        model.fit(X2, y)
+        key = id(X2)
+        assert key in _conversion_cache
+        del X2
+        assert key not in _conversion_cache
+
+    def test_cache_conversions_disabled(self, Model, data, monkeypatch):
+        X, y = data
+        calls = []
+
+        def from_python(obj):
+            calls.append(id(obj))
+            return object()
+
+        monkeypatch.setattr(Model, '_from_python', staticmethod(from_python))
+        model = Model(scriptname='myscript', funcname='myfunc')
+        model.fit(X, y)
+        model.fit(X, y)
+        assert len(calls) == 4
+
 
 class TestClassificationModel(TestAbstractModel):
     @pytest.fixture
@@ -124,6 +203,62 @@ class TestClassificationModel(TestAbstractModel):
         result = model.predict_proba(X)
         assert (result == model.r['predict'].return_value).all()
 
+    def test_predict_chunksize(self, Model):
+        X = numpy.arange(15, dtype=float).reshape(5, 3)
+        model = Model(scriptname='myscript', funcname='myfunc',
+                      predict_chunksize=2)
+        model.fit(X, numpy.array([0, 1, 0, 1, 0]))
+        model.r['predict'].side_effect = (
+            lambda rmodel, X, type: numpy.asarray(X) / 10)
+
+        result = model.predict_proba(X)
+        assert model.r['predict'].call_count == 3
+        assert (result == X / 10).all()
+
+    @pytest.mark.parametrize('astype', [
+        lambda X: X,
+        DataFrame,
+        ])
+    def test_predict_no_copy(self, Model, data, monkeypatch, astype):
+        X, y = data
+        X = astype(X)
+        passed = []
+        monkeypatch.setattr(
+            Model, '_from_python', staticmethod(passed.append))
+        model = Model(scriptname='myscript', funcname='myfunc')
+        model.r['predict'].return_value = numpy.array(
+            [[0.1, 0.9], [0.8, 0.2]])
+        model.rmodel_ = object()
+        assert (model.predict(X) == [1, 0]).all()
+        assert passed[0] is X
+
+    def test_score(self, Model, dataframe):
+        X, y = dataframe
+        model = Model(scriptname='myscript', funcname='myfunc',
+                      encode_labels=True)
+        model.r['predict'].return_value = numpy.array(
+            [[0.1, 0.9], [0.2, 0.8]])
+        model.fit(X, y)
+        assert model.score(X, y) == 0.5
+        assert model.score(X, Series([2, 2])) == 1.0
+        assert model.score(X, numpy.asarray(y).reshape(-1, 1)) == 0.5
+        with pytest.raises(ValueError):
+            model.score(X, y[:1])
+
+    def test_predict_type(self, Model, data):
+        X, y = data
+        model = Model(scriptname='myscript', funcname='myfunc',
+                      predict_type='response')
+        model.r['predict'].return_value = numpy.array([3, 1])
+        model.r['as.integer'] = lambda codes: codes
+        model.fit(X, y)
+
+        result = model.predict(X)
+        predictargs = model.r['predict'].call_args
+        assert predictargs[0][0] is model.rmodel_
+        assert predictargs[1]['type'] == 'response'
+        assert (result == [2, 0]).all()
+
 
 class TestClassification:
     @pytest.fixture
@@ -253,3 +388,20 @@ class TestRegressionWithPandasDataset(TestRegression):
         X, y = dataset()
         model.fit(X, y)
         assert model.score(X, y) == 1.0
+
+
+class TestRpy2Transform:
+    def test_transform_leaves_input_alone(self):
+        from palladium.R import Rpy2Transform
+        X = DataFrame(
+            [[1.0, 0], [4.0, 1]],
+            columns=('one', 'really'),
+            )
+        X_fit = X.copy()
+        X_fit['really'] = X_fit['really'].astype('category')
+        transform = Rpy2Transform().fit(X_fit, None)
+
+        X_t = transform.transform(X)
+        assert X['really'].dtype == numpy.int64
+        assert list(X_t.colnames) == ['one', 'really']
+        assert list(ri2py(X_t)['really'].cat.categories) == [0, 1]
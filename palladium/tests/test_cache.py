@@ -78,6 +78,46 @@ class TestDiskCache:
         assert len(tmpdir.listdir()) > 0
         assert called == [2, 3]
 
+    def test_filename(self, diskcache, tmpdir):
+        @diskcache(filename_tmpl=str(tmpdir.join('{func}-{key}')))
+        def squareit(x):
+            return x ** 2
+
+        filename = squareit.__cache__._filename(('key', 1))
+        assert filename.startswith(str(tmpdir.join('squareit-')))
+        assert len(filename.rsplit('-', 1)[1]) == 8
+        assert filename == squareit.__cache__._filename(('key', 1))
+        assert filename != squareit.__cache__._filename(('key', 2))
+
+    def test_filename_large_arrays(self, diskcache, tmpdir):
+        @diskcache(filename_tmpl=str(tmpdir.join('{func}-{key}')))
+        def squareit(x):
+            return x ** 2
+
+        X1 = np.zeros(10000)
+        X2 = X1.copy()
+        X2[5000] = 1
+        filename1 = squareit.__cache__._filename(((X1,), ()))
+        filename2 = squareit.__cache__._filename(((X2,), ()))
+        assert filename1 != filename2
+        assert filename1 == squareit.__cache__._filename(((X1.copy(),), ()))
+
+    @pytest.mark.parametrize('mmap_mode', ['c', None])
+    def test_mmap_mode(self, diskcache, tmpdir, mmap_mode):
+        cache = diskcache(mmap_mode=mmap_mode)
+        filename = str(tmpdir.join('value.pickle'))
+        cache.dump({'a': np.arange(1000, dtype=float)}, filename)
+        loaded = cache.load(filename)
+        assert (loaded['a'] == np.arange(1000)).all()
+        loaded['a'][0] = 42
+        assert cache.load(filename)['a'][0] == 0
+
+    def test_mmap_mode_default(self, diskcache, tmpdir):
+        cache = diskcache()
+        filename = str(tmpdir.join('value.pickle'))
+        cache.dump({'a': np.arange(1000, dtype=float)}, filename)
+        assert not isinstance(cache.load(filename)['a'], np.memmap)
+
     def test_it_bad_filename(self, diskcache):
         with pytest.raises(ValueError):
             diskcache(filename_tmpl='string-without-key')
@@ -107,6 +147,31 @@ class TestPickleDiskCache(TestDiskCache):
         from palladium.cache import picklediskcache
         return picklediskcache
 
+    def test_dump_load_buffers(self, diskcache, tmpdir):
+        cache = diskcache()
+        filename = str(tmpdir.join('value.pickle'))
+        value = {
+            'a': np.arange(1000, dtype=float),
+            'b': np.arange(12).reshape(3, 4).T,
+            'c': 'hello',
+            }
+        cache.dump(value, filename)
+        loaded = cache.load(filename)
+        assert (loaded['a'] == value['a']).all()
+        assert (loaded['b'] == value['b']).all()
+        assert loaded['c'] == 'hello'
+
+        # loaded arrays are writable, but the file stays unchanged:
+        loaded['a'][0] = 42
+        assert cache.load(filename)['a'][0] == 0
+
+    def test_load_plain_pickle(self, diskcache, tmpdir):
+        import pickle
+        filename = str(tmpdir.join('value.pickle'))
+        with open(filename, 'wb') as f:
+            pickle.dump(np.arange(3), f, -1)
+        assert (diskcache().load(filename) == np.arange(3)).all()
+
 
 class TestComputeKeyAttrs:
     @pytest.fixture
@@ -3,8 +3,10 @@ from copy import deepcopy
 from functools import reduce
 import operator
 import os
+import sys
 import threading
 import time
+from unittest.mock import MagicMock
 from unittest.mock import patch
 
 import pytest
@@ -55,6 +57,14 @@ def test_config_class_keyerror():
     assert "Maybe you forgot to set" in str(e.value)
 
 
+def test_config_class_get():
+    from palladium.config import Config
+    config = Config({'one': 1})
+    assert config['one'] == 1
+    assert config.get('invalid') is None
+    assert 'invalid' not in config
+
+
 class TestInitializeConfig:
     @pytest.fixture
     def initialize_config(self):
@@ -157,6 +167,34 @@ class TestGetConfig:
         config = get_config()
         assert config['blocking'].__pld_config_key__ == 'blocking'
 
+    def test_sys_path(self, get_config, config, config1_fname,
+                      monkeypatch):
+        monkeypatch.setitem(os.environ, 'PALLADIUM_CONFIG', config1_fname)
+        monkeypatch.setitem(os.environ, 'ENV1', 'one')
+        # The configuration's directory takes precedence even if it's
+        # on the path already:
+        monkeypatch.setattr(
+            sys, 'path', list(sys.path) + [os.path.dirname(config1_fname)])
+        get_config()
+        assert sys.path[0] == os.path.dirname(config1_fname)
+
+    def test_no_lock_when_loaded(self, get_config, config1_fname,
+                                 monkeypatch):
+        monkeypatch.setitem(os.environ, 'PALLADIUM_CONFIG', config1_fname)
+        monkeypatch.setitem(os.environ, 'ENV1', 'one')
+        config = get_config()
+        assert config.loaded
+        with patch('palladium.config._get_config_lock') as lock:
+            assert get_config() is config
+        assert lock.__enter__.call_count == 0
+
+    def test_lock_while_loading(self, get_config, config):
+        config.initialized = True
+        config.loaded = False
+        with patch('palladium.config._get_config_lock') as lock:
+            get_config()
+        assert lock.__enter__.call_count == 1
+
 
 class TestProcessConfig:
     @pytest.fixture
@@ -309,6 +347,46 @@ C['myotherconstant'] = 13
         assert config['mycopiedconstant'] == 3
         assert config['mycopywithdefault'] == 42
 
+    def test_copy_snapshot_only_referenced(self, process_config):
+        copied = []
+
+        class Recorder(dict):
+            def __deepcopy__(self, memo):
+                copied.append(self['name'])
+                return Recorder(self)
+
+        config1 = {
+            'referenced': Recorder(name='referenced', value=1),
+            'unrelated': Recorder(name='unrelated', value=2),
+            }
+        config2 = {
+            'mycopy': {'__copy__': 'referenced.value'},
+            }
+        config = process_config(config1, config2)
+        assert config['mycopy'] == 1
+        assert 'unrelated' not in copied
+
+    def test_copy_nested_copy(self, process_config):
+        config = process_config({
+            'a': 1,
+            'b': {'x': {'__copy__': 'a'}},
+            'c': {'__copy__': 'b'},
+            'd': {'__copy__': 'c', 'y': {'__factory__': 'builtins.dict'}},
+            })
+        assert config['c'] == {'x': 1}
+        assert config['d'] == {'x': 1, 'y': {}}
+
+    def test_copy_single_pass(self, process_config):
+        from palladium.config import _handlers_phase0
+        with patch('palladium.config._run_config_handlers') as run:
+            process_config(
+                {'a': {'b': 1}, 'c': {'__copy__': 'a'}},
+                handlers0=_handlers_phase0,
+                handlers1=lambda config: {},
+                handlers2=lambda config: {},
+                )
+        assert run.call_count == 2  # phases 1 and 2 only
+
     @pytest.fixture
     def config3(self):
         return {
@@ -350,3 +428,51 @@ C['myotherconstant'] = 13
         with patch('palladium.config.dictConfig') as dictConfig:
             process_config({'logging': 'yes, please'})
             dictConfig.assert_called_with('yes, please')
+
+
+class TestRunConfigHandlers:
+    @pytest.fixture
+    def run_config_handlers(self):
+        from palladium.config import _run_config_handlers
+        return _run_config_handlers
+
+    @staticmethod
+    def handler(calls):
+        def handler(name, props):
+            calls.append(name)
+            return {'handled': props['tag']}
+        return handler
+
+    def test_order(self, run_config_handlers):
+        calls = []
+        config = {
+            'a': {'tag': 'a', 'b': {'tag': 'b'}, 'c': [{'tag': 'c'}]},
+            'd': [[{'tag': 'd'}], {'tag': 'e', 'x': 1}],
+            'f': {'x': {'tag': 'f'}},
+            }
+        result = run_config_handlers(config, {'tag': self.handler(calls)})
+        assert calls == ['b', '0', 'a', '0', '1', 'x']
+        assert result == {
+            'a': {'handled': 'a'},
+            'd': [[{'handled': 'd'}], {'handled': 'e'}],
+            'f': {'x': {'handled': 'f'}},
+            }
+
+    def test_deeply_nested(self, run_config_handlers):
+        calls = []
+        config = inner = {}
+        for i in range(5000):
+            inner['child'] = inner = {}
+        inner['component'] = {'tag': 'deep'}
+        run_config_handlers(config, {'tag': self.handler(calls)})
+        assert calls == ['component']
+        assert inner['component'] == {'handled': 'deep'}
+
+    def test_no_handler_keys(self, run_config_handlers):
+        handler = MagicMock()
+        config = {'a': {'b': [{'c': 1}]}}
+        with patch('palladium.config._run_config_handlers_tree') as walk:
+            assert run_config_handlers(config, {'tag': handler}) is config
+        assert walk.call_count == 0
+        assert handler.call_count == 0
+        handler.finish.assert_called_with()
@@ -1,11 +1,23 @@
+import csv
 import os
+import threading
 from threading import Thread
 from unittest.mock import MagicMock
 from unittest.mock import patch
 
+import numpy as np
+from packaging.version import Version
+import pandas
 from pandas import DataFrame
 import pytest
 import sklearn
+import sqlalchemy
+
+# pandas 2.2 and later can only read from SQLAlchemy 2 engines:
+needs_pandas_sqlalchemy = pytest.mark.skipif(
+    Version(pandas.__version__) >= Version('2.2') and
+    Version(sqlalchemy.__version__) < Version('2.0'),
+    reason="pandas version doesn't support this SQLAlchemy version")
 
 dummy_dataframe = DataFrame({
     'datacol1': [10, 11, 12, 13, 14],
@@ -65,6 +77,71 @@ class TestCSV:
         assert len(data) == len(dummy_dataframe)
         assert target is None
 
+    def test_usecols_adds_target(self, CSV):
+        with patch("palladium.dataset.CSV.pandas_read") as read_csv:
+            read_csv.return_value = dummy_dataframe[['datacol1', 'targetcol']]
+            dataset = CSV('mypath', 'targetcol', usecols=['datacol1'])
+            data, target = dataset()
+
+        read_csv.assert_called_with(
+            'mypath', usecols=['datacol1', 'targetcol'])
+        assert data.tolist() == [[10], [11], [12], [13], [14]]
+        assert target.tolist() == [0, 1, 2, 3, 4]
+
+    def test_local_file(self, CSV, tmpdir):
+        path = str(tmpdir.join('data.csv'))
+        dummy_dataframe.to_csv(path, index=False)
+        dataset = CSV(path, 'targetcol', dtype={'datacol1': 'float32'})
+        with patch.object(
+                CSV, 'pandas_read',
+                wraps=CSV.pandas_read) as read_csv:
+            data, target = dataset()
+
+        assert read_csv.call_args[1]['memory_map'] is True
+        assert 'memory_map' not in dataset.kwargs
+        assert data.tolist() == dummy_dataframe[
+            ['datacol1', 'datacol2']].values.tolist()
+        assert target.tolist() == [0, 1, 2, 3, 4]
+
+    @pytest.mark.parametrize('skiprows', [1, 3, 5, 10])
+    def test_skiprows_local_file(self, CSV, tmpdir, skiprows):
+        path = str(tmpdir.join('data.csv'))
+        dummy_dataframe.to_csv(path, index=False, header=False)
+        names = list(dummy_dataframe.columns)
+        dataset = CSV(path, 'targetcol', names=names, skiprows=skiprows)
+        with patch.object(
+                CSV, 'pandas_read',
+                wraps=CSV.pandas_read) as read_csv:
+            data, target = dataset()
+
+        assert (read_csv.call_args[0][0] == path) == (skiprows > 5)
+        assert target.tolist() == list(range(5))[skiprows:]
+        assert data.tolist() == dummy_dataframe[
+            ['datacol1', 'datacol2']].values[skiprows:].tolist()
+
+    def test_skiprows_quoted(self, CSV, tmpdir):
+        path = str(tmpdir.join('data.csv'))
+        with open(path, 'w') as f:
+            f.write('"multi\nline",1\nfoo,2\nbar,3\n')
+        dataset = CSV(path, 'b', names=['a', 'b'], skiprows=1, ndarray=False)
+        data, target = dataset()
+        assert data['a'].tolist() == ['foo', 'bar']
+        assert target.tolist() == [2, 3]
+
+    def test_skiprows_no_quotechar(self, CSV, tmpdir):
+        path = str(tmpdir.join('data.csv'))
+        with open(path, 'w') as f:
+            f.write('"x,1\nfoo,2\nbar,3\n')
+        dataset = CSV(path, 'b', names=['a', 'b'], skiprows=1,
+                      quotechar=None, quoting=csv.QUOTE_NONE, ndarray=False)
+        with patch.object(
+                CSV, 'pandas_read',
+                wraps=CSV.pandas_read) as read_csv:
+            data, target = dataset()
+        assert read_csv.call_args[0][0] != path
+        assert data['a'].tolist() == ['foo', 'bar']
+        assert target.tolist() == [2, 3]
+
 
 class TestSQL:
     @pytest.fixture
@@ -134,6 +211,142 @@ class TestSQL:
         [th.start() for th in threads]
         [th.join() for th in threads]
 
+    def test_chunksize_database(self, SQL, sql):
+        # Read the chunks from the database with the streaming
+        # connection we're given, like pandas' read_sql does; pandas
+        # can't use every SQLAlchemy version that we support:
+        def read_sql(query, connection, chunksize):
+            assert connection.get_execution_options()['stream_results']
+            result = connection.execute(query)
+            columns = list(result.keys())
+            while True:
+                rows = result.fetchmany(chunksize)
+                if not rows:
+                    break
+                yield DataFrame([tuple(row) for row in rows], columns=columns)
+
+        sql.chunksize = 2
+        with patch.object(SQL, 'pandas_read', side_effect=read_sql):
+            X, y = sql()
+        assert X.tolist() == [
+            [24., 60.],
+            [33., 73.],
+            [27., 67.5],
+            ]
+        assert y.tolist() == [
+            10000.0,
+            20000.0,
+            35000.0,
+            ]
+
+    def test_chunksize(self, SQL):
+        dataset = SQL(
+            url='sqlite://',
+            sql='select * from employee',
+            target_column='targetcol',
+            chunksize=2,
+            )
+        chunks = [dummy_dataframe[:2], dummy_dataframe[2:4],
+                  dummy_dataframe[4:]]
+        with patch.object(SQL, 'pandas_read') as read_sql:
+            read_sql.return_value = iter(chunks)
+            X, y = dataset()
+
+        args, kwargs = read_sql.call_args
+        assert args[0] == 'select * from employee'
+        assert args[1].get_execution_options()['stream_results'] is True
+        assert kwargs == {'chunksize': 2}
+        assert X.tolist() == dummy_dataframe[
+            ['datacol1', 'datacol2']].values.tolist()
+        assert y.tolist() == [0, 1, 2, 3, 4]
+
+    def test_chunksize_dtypes(self, SQL):
+        dataset = SQL(
+            url='sqlite://',
+            sql='select * from employee',
+            ndarray=False,
+            chunksize=2,
+            )
+        chunks = [
+            DataFrame({'weight': [60.0, 73.0], 'name': ['James', 'Guido']}),
+            DataFrame({'weight': [None, None], 'name': ['Jack', 'Tim']}),
+            ]
+        with patch.object(SQL, 'pandas_read') as read_sql:
+            read_sql.return_value = iter(chunks)
+            X, y = dataset()
+        assert X['weight'].dtype == np.float64
+        assert X['weight'].isnull().tolist() == [False, False, True, True]
+        assert X['name'].dtype == chunks[0]['name'].dtype
+
+    def test_no_chunksize(self, SQL):
+        dataset = SQL(
+            url='sqlite://',
+            sql='select * from employee',
+            target_column='targetcol',
+            )
+        with patch.object(SQL, 'pandas_read') as read_sql:
+            read_sql.return_value = dummy_dataframe
+            X, y = dataset()
+        read_sql.assert_called_with('select * from employee', dataset.engine)
+        assert y.tolist() == [0, 1, 2, 3, 4]
+
+    def test_usecols_query(self, SQL):
+        dataset = SQL(
+            url='sqlite://',
+            sql='select * from employee',
+            target_column='salary',
+            usecols=['age', 'body weight'],
+            )
+        assert dataset.sql == (
+            'SELECT age, "body weight", salary '
+            'FROM (select * from employee) _sub')
+
+    def test_usecols_table(self, SQL):
+        dataset = SQL(
+            url='sqlite://',
+            sql='employee',
+            target_column='salary',
+            usecols=['age'],
+            )
+        assert dataset.sql == 'employee'
+        assert dataset.kwargs == {'columns': ['age', 'salary']}
+
+    def test_usecols_schema_table(self, SQL):
+        dataset = SQL(
+            url='sqlite://',
+            sql='Staff.Employee',
+            target_column='salary',
+            usecols=['age'],
+            )
+        assert dataset.sql == 'SELECT age, salary FROM "Staff"."Employee"'
+
+    @needs_pandas_sqlalchemy
+    @pytest.mark.parametrize('sql', [
+        'employee',
+        'select * from employee where age > 25',
+        ])
+    def test_usecols(self, SQL, tmpdir, sql):
+        url = 'sqlite:///{}'.format(tmpdir.join('usecols.sqlite'))
+        dataset = SQL(
+            url=url,
+            sql=sql,
+            target_column='salary',
+            usecols=['age'],
+            )
+        DataFrame({
+            'name': ['James', 'Guido', 'Handsome Jack'],
+            'age': [24, 33, 27],
+            'salary': [10000.0, 20000.0, 35000.0],
+            }).to_sql('employee', dataset.engine, index=False)
+
+        X, y = dataset()
+        if sql == 'employee':
+            assert X.tolist() == [[24], [33], [27]]
+            assert y.tolist() == [10000.0, 20000.0, 35000.0]
+        else:
+            assert X.tolist() == [[33], [27]]
+            assert y.tolist() == [20000.0, 35000.0]
+
 
 @pytest.mark.skipif(sklearn.__version__ < "0.20.1",
                     reason="scikit-learn version too old")
@@ -158,6 +371,98 @@ def test_empty_dataset_loader():
     assert y is None
 
 
+class TestDiskCacheDatasetLoader:
+    @pytest.fixture
+    def DiskCacheDatasetLoader(self):
+        from palladium.dataset import DiskCacheDatasetLoader
+        return DiskCacheDatasetLoader
+
+    def test_it(self, DiskCacheDatasetLoader, tmpdir):
+        impl = MagicMock(path='mypath', target_column='targetcol')
+        impl.return_value = np.arange(12.).reshape(4, 3), np.arange(4)
+        filename_tmpl = str(tmpdir.join('{module}.{func}-{key}.pickle'))
+        loader = DiskCacheDatasetLoader(
+            impl, ['path', 'target_column'], filename_tmpl=filename_tmpl)
+
+        X1, y1 = loader()
+        X2, y2 = loader()
+        assert impl.call_count == 1
+        assert isinstance(X2, np.memmap)
+        assert (X1 == X2).all() and (y1 == y2).all()
+
+        impl.path = 'otherpath'
+        other = DiskCacheDatasetLoader(
+            impl, ['path', 'target_column'], filename_tmpl=filename_tmpl)
+        other()
+        assert impl.call_count == 2
+        assert len(tmpdir.listdir()) == 2
+
+    def test_file_changed(self, DiskCacheDatasetLoader, tmpdir):
+        from palladium.dataset import CSV
+        path = tmpdir.join('data.csv')
+        dummy_dataframe.to_csv(str(path), index=False)
+        filename_tmpl = str(tmpdir.join('{module}.{func}-{key}.pickle'))
+        loader = DiskCacheDatasetLoader(
+            CSV(str(path), 'targetcol'), ['path'],
+            filename_tmpl=filename_tmpl)
+
+        X, y = loader()
+        assert y.tolist() == [0, 1, 2, 3, 4]
+        dummy_dataframe[:2].to_csv(str(path), index=False)
+        X, y = loader()
+        assert y.tolist() == [0, 1]
+
+    def test_same_stamp_other_file(self, DiskCacheDatasetLoader, tmpdir):
+        from palladium.dataset import CSV
+        paths = [tmpdir.join('train.csv'), tmpdir.join('test.csv')]
+        dummy_dataframe[:2].to_csv(str(paths[0]), index=False)
+        dummy_dataframe[3:5].to_csv(str(paths[1]), index=False)
+        stat = os.stat(str(paths[0]))
+        os.utime(str(paths[1]), ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        assert os.stat(str(paths[1])).st_size == stat.st_size
+        filename_tmpl = str(tmpdir.join('{module}.{func}-{key}.pickle'))
+
+        # Loaders with the same attrs for different files:
+        targets = [
+            DiskCacheDatasetLoader(
+                CSV(str(path), 'targetcol'), ['target_column'],
+                filename_tmpl=filename_tmpl,
+                )()[1].tolist()
+            for path in paths
+            ]
+        assert targets == [[0, 1], [3, 4]]
+
+    def test_engine_key(self, DiskCacheDatasetLoader):
+        from palladium.dataset import SQL
+        keys = [
+            DiskCacheDatasetLoader(
+                SQL('sqlite:///data.sqlite', 'employee'), ['engine', 'sql'],
+                ).key
+            for i in range(2)
+            ]
+        assert keys[0] == keys[1] == ('sqlite:///data.sqlite', 'employee')
+
+    def test_default_attrs(self, DiskCacheDatasetLoader, tmpdir):
+        from palladium.dataset import SQL
+        filename_tmpl = str(tmpdir.join('{module}.{func}-{key}.pickle'))
+        loaders = [
+            DiskCacheDatasetLoader(
+                SQL('sqlite:///data.sqlite', sql, target_column='t'),
+                filename_tmpl=filename_tmpl,
+                )
+            for sql in ['SELECT * FROM train', 'SELECT * FROM test']
+            ]
+        assert loaders[0].attrs == [
+            'chunksize', 'engine', 'kwargs', 'ndarray', 'sql',
+            'target_column', 'usecols']
+        for loader, value in zip(loaders, ['train', 'test']):
+            with patch.object(SQL, '__call__', return_value=value) as call:
+                assert loader() == value
+                assert loader() == value
+            assert call.call_count == 1
+        assert len(tmpdir.listdir()) == 2
+
+
 class TestScheduledDatasetLoader:
     @pytest.fixture
     def ScheduledDatasetLoader(self, process_store):
@@ -188,3 +493,40 @@ class TestScheduledDatasetLoader:
         assert loader.update_cache() == ('bla', 'bla')
         assert loader() == ('bla', 'bla')
         assert loader.impl.call_count == 2
+
+    def test_lazy(self, ScheduledDatasetLoader, config, process_store):
+        started = threading.Event()
+        release = threading.Event()
+
+        def load():
+            started.set()
+            release.wait()
+            return 'X', 'y'
+
+        loader = ScheduledDatasetLoader(
+            load,
+            {'freq': 'DAILY', 'dtstart': '2014-10-30T13:21:18'},
+            eager=False,
+            )
+        loader.initialize_component(config)
+        assert started.wait(1)
+        assert 'data' not in process_store
+
+        result = []
+        caller = Thread(target=lambda: result.append(loader()))
+        caller.start()
+        caller.join(0.05)
+        assert not result
+        release.set()
+        caller.join(1)
+        assert result == [('X', 'y')]
+
+    def test_lazy_error(self, ScheduledDatasetLoader, config, process_store):
+        loader = ScheduledDatasetLoader(
+            MagicMock(side_effect=ValueError("boom")),
+            {'freq': 'DAILY', 'dtstart': '2014-10-30T13:21:18'},
+            eager=False,
+            )
+        loader.initialize_component(config)
+        with pytest.raises(ValueError):
+            loader()
@@ -1,3 +1,5 @@
+from threading import Barrier
+from threading import get_ident
 from unittest.mock import Mock
 from unittest.mock import call
 from unittest.mock import patch
@@ -66,6 +68,101 @@ class TestTest:
         scoring['accuracy'].assert_called_with(model, X, y)
         assert sorted(result) == ['AUC: 1.23', 'accuracy: 3.45']
 
+    def test_scoring_shares_predictions(self, test):
+        from sklearn.datasets import load_iris
+        from sklearn.linear_model import LogisticRegression
+
+        X, y = load_iris(return_X_y=True)
+        model = LogisticRegression(max_iter=1000).fit(X, y)
+        model.__metadata__ = {'version': 1}
+        dataset_loader_test = Mock(return_value=(X, y))
+        model_persister = Mock()
+        model_persister.read.return_value = model
+        with patch.object(
+                LogisticRegression, 'predict',
+                autospec=True, side_effect=LogisticRegression.predict,
+                ) as predict:
+            result = test(dataset_loader_test, model_persister,
+                          scoring={'accuracy': 'accuracy', 'f1': 'f1_macro'})
+        assert predict.call_count == 1
+        assert [score.split(':')[0] for score in result] == [
+            'accuracy', 'f1']
+
+    @pytest.mark.parametrize('broken', ['import', 'constructor'])
+    def test_scoring_no_multimetric_scorer(self, broken):
+        from palladium.eval import _score_shared
+        from sklearn.datasets import load_iris
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.metrics import get_scorer
+
+        X, y = load_iris(return_X_y=True)
+        model = LogisticRegression(max_iter=1000).fit(X, y)
+        scorers = {
+            'accuracy': get_scorer('accuracy'), 'f1': get_scorer('f1_macro')}
+        expected = {key: scorer(model, X, y)
+                    for key, scorer in scorers.items()}
+        if broken == 'import':
+            patcher = patch.dict('sys.modules',
+                                 {'sklearn.metrics._scorer': None})
+        else:
+            patcher = patch('sklearn.metrics._scorer._MultimetricScorer',
+                            side_effect=TypeError)
+        with patcher:
+            assert _score_shared(model, X, y, scorers) == expected
+
+    def test_scoring_serial(self, test):
+        threads = []
+
+        def scorer(model, X, y):
+            threads.append(get_ident())
+            return 0.5
+
+        dataset_loader_test, model_persister = Mock(), Mock()
+        dataset_loader_test.return_value = object(), object()
+        model_persister.read.return_value.__metadata__ = {'version': 1}
+        result = test(dataset_loader_test, model_persister,
+                      scoring={'one': scorer, 'two': scorer})
+        assert result == ['one: 0.5', 'two: 0.5']
+        assert threads == [get_ident()] * 2
+
+    def test_scoring_concurrent(self, test):
+        # Custom scorers can't share predictions, so with n_jobs they
+        # run in parallel and wait for each other here:
+        barrier = Barrier(2, timeout=5)
+
+        def scorer(model, X, y):
+            barrier.wait()
+            return 0.5
+
+        dataset_loader_test, model_persister = Mock(), Mock()
+        dataset_loader_test.return_value = object(), object()
+        model_persister.read.return_value.__metadata__ = {'version': 1}
+        result = test(dataset_loader_test, model_persister,
+                      scoring={'one': scorer, 'two': scorer}, n_jobs=2)
+        assert result == ['one: 0.5', 'two: 0.5']
+
+    def test_concurrent_loading(self, test):
+        # Both loading functions wait for each other to have started:
+        barrier = Barrier(2, timeout=5)
+        X, y = object(), object()
+        model = Mock(__metadata__={'version': 1})
+
+        def dataset_loader_test():
+            barrier.wait()
+            return X, y
+
+        def read(version):
+            barrier.wait()
+            return model
+
+        test(dataset_loader_test, Mock(read=read))
+        model.score.assert_called_with(X, y)
+
+    def test_data_error(self, test):
+        dataset_loader_test = Mock(side_effect=IOError("no data"))
+        with pytest.raises(IOError):
+            test(dataset_loader_test, Mock())
+
 
 class TestList:
     @pytest.fixture
@@ -1,9 +1,13 @@
 from datetime import datetime
 from functools import partial
 import numpy as np
+import subprocess
+import sys
+from threading import Barrier
 from unittest.mock import Mock
 from unittest.mock import call
 from unittest.mock import patch
+import weakref
 
 from dateutil.parser import parse
 import pandas
@@ -88,6 +92,71 @@ class TestFit:
         assert model.score.mock_calls[1] == call(X_test, y_test)
         model_persister.write.assert_called_with(model)
 
+    def test_evaluate_frees_test_dataset(self, fit, dataset_loader):
+        class Data:
+            pass
+
+        refs = []
+
+        def dataset_loader_test():
+            X_test, y_test = Data(), Data()
+            refs.extend([weakref.ref(X_test), weakref.ref(y_test)])
+            return X_test, y_test
+
+        def write(model):
+            assert [ref() for ref in refs] == [None, None]
+
+        model = Mock()
+        del model.cv_results_
+        fit(
+            dataset_loader_train=dataset_loader,
+            model=model,
+            model_persister=Mock(write=Mock(side_effect=write)),
+            dataset_loader_test=dataset_loader_test,
+            scoring=lambda model, X, y: 0.5,
+            evaluate=True,
+            )
+        assert len(refs) == 2
+
+    def test_evaluate_loads_test_dataset_concurrently(self, fit):
+        # Scoring on the train set waits for the test data to load:
+        barrier = Barrier(2, timeout=5)
+        X, y, X_test, y_test = object(), object(), object(), object()
+
+        def dataset_loader_test():
+            barrier.wait()
+            return X_test, y_test
+
+        def scorer(model, X_, y_):
+            if X_ is X:
+                barrier.wait()
+            return 0.5
+
+        model = Mock()
+        del model.cv_results_
+        fit(
+            dataset_loader_train=Mock(return_value=(X, y)),
+            model=model,
+            model_persister=Mock(),
+            dataset_loader_test=dataset_loader_test,
+            scoring=scorer,
+            evaluate=True,
+            )
+        assert model.__metadata__['score_train'] == 0.5
+        assert model.__metadata__['score_test'] == 0.5
+
+    def test_evaluate_test_dataset_error(self, fit, dataset_loader):
+        model, model_persister = Mock(), Mock()
+        with pytest.raises(IOError):
+            fit(
+                dataset_loader_train=dataset_loader,
+                model=model,
+                model_persister=model_persister,
+                dataset_loader_test=Mock(side_effect=IOError("no data")),
+                evaluate=True,
+                )
+        assert model_persister.write.call_count == 0
+
     def test_evaluate_annotations(self, fit, dataset_loader):
         model = Mock()
         del model.cv_results_
@@ -121,6 +190,24 @@ class TestFit:
         assert model.score.call_count == 0
         assert scorer.call_count == 2
 
+    def test_evaluate_scoring_no_score_lookup(self, fit, dataset_loader):
+        class Model:
+            def fit(self, X, y):
+                pass
+
+            def __getattr__(self, name):
+                assert name != 'score'
+                raise AttributeError(name)
+
+        fit(
+            dataset_loader_train=dataset_loader,
+            model=Model(),
+            model_persister=Mock(),
+            scoring=lambda model, X, y: 0.5,
+            evaluate=True,
+            persist=False,
+            )
+
     def test_evaluate_no_score(self, fit, dataset_loader):
         model = Mock()
         del model.score
@@ -258,6 +345,46 @@ class TestFit:
         model_persister.write.assert_called_with(model)
 
 
+@pytest.mark.parametrize('use_orjson', [True, False])
+def test_cv_results_json(use_orjson, monkeypatch):
+    import json
+    from palladium.fit import _cv_results_json
+
+    if not use_orjson:
+        monkeypatch.setattr('palladium.fit.orjson', None)
+
+    cv_results = {
+        'param_C': np.ma.masked_array(
+            [0.1, 1.0, 0], mask=[False, False, True], dtype=object),
+        'params': [{'C': np.float64(0.1)}, {'C': 1.0}, {}],
+        'mean_test_score': np.array([0.5, np.nan, 0.75]),
+        'rank_test_score': np.array([2, 3, 1], dtype=np.int32),
+        }
+    assert json.loads(_cv_results_json(cv_results)) == [
+        {'param_C': 0.1, 'params': {'C': 0.1},
+         'mean_test_score': 0.5, 'rank_test_score': 2},
+        {'param_C': 1.0, 'params': {'C': 1.0},
+         'mean_test_score': None, 'rank_test_score': 3},
+        {'param_C': None, 'params': {},
+         'mean_test_score': 0.75, 'rank_test_score': 1},
+        ]
+
+    assert json.loads(_cv_results_json({'big': [2 ** 70]})) == [
+        {'big': 2 ** 70}]
+
+
+def test_lazy_imports():
+    # Commands like pld-admin and pld-list shouldn't have to wait for
+    # scikit-learn's model selection and metrics modules to load:
+    code = (
+        "import sys, palladium.fit, palladium.eval; "
+        "print([name for name in ('sklearn.model_selection', "
+        "'sklearn.metrics') if name in sys.modules])"
+        )
+    output = subprocess.check_output([sys.executable, '-c', code])
+    assert output.decode().strip() == '[]'
+
+
 def test_activate():
     from palladium.fit import activate
 
@@ -286,7 +413,7 @@ class TestGridSearch:
 
         GridSearchCV = Mock()
         monkeypatch.setattr(
-            'palladium.fit.GridSearchCV', GridSearchCV)
+            'sklearn.model_selection.GridSearchCV', GridSearchCV)
         GridSearchCV().cv_results_ = scores
         return GridSearchCV
 
@@ -309,7 +436,8 @@ class TestGridSearch:
             save_results=str(results_csv),
             )
         dataset_loader_train.assert_called_with()
-        GridSearchCVWithScores.assert_called_with(model, refit=False, verbose=4)
+        GridSearchCVWithScores.assert_called_with(
+            model, refit=False, n_jobs=-1, verbose=4)
         GridSearchCVWithScores().fit.assert_called_with(X, y)
         assert result is GridSearchCVWithScores()
         scores = GridSearchCVWithScores().cv_results_
@@ -318,6 +446,36 @@ class TestGridSearch:
         assert (str(pandas.DataFrame(scores)).strip() ==
                 str(pandas.read_csv(str(results_csv))).strip())
 
+    @pytest.mark.parametrize('params,n_jobs,expected', [
+        ({}, None, -1),
+        ({'n_jobs': 2}, None, 2),
+        ({'n_jobs': 2}, 1, 1),
+        ])
+    def test_n_jobs(self, grid_search, GridSearchCVWithScores,
+                    params, n_jobs, expected):
+        model, dataset_loader_train = Mock(), Mock()
+        dataset_loader_train.return_value = object(), object()
+        grid_search(dataset_loader_train, model, params, n_jobs=n_jobs)
+        assert GridSearchCVWithScores.call_args[1]['n_jobs'] == expected
+
+    def test_results_sorted(self, grid_search, GridSearchCVWithScores,
+                            capsys, tmpdir):
+        GridSearchCVWithScores().cv_results_ = {
+            'mean_test_score': np.array([0.1, 0.3, 0.2, 0.3]),
+            'params': [{'C': 0.1}, {'C': 0.3}, {'C': 1.0}, {'C': 3.0}],
+            'rank_test_score': np.array([3, 1, 2, 1], dtype=np.int32),
+            }
+        model, dataset_loader_train = Mock(), Mock()
+        dataset_loader_train.return_value = object(), object()
+        results_csv = tmpdir.join('results.csv')
+        grid_search(dataset_loader_train, model, {},
+                    save_results=str(results_csv))
+
+        results = pandas.read_csv(str(results_csv))
+        assert results['rank_test_score'].tolist() == [1, 1, 2, 3]
+        assert results['params'].tolist() == [
+            "{'C': 0.3}", "{'C': 3.0}", "{'C': 1.0}", "{'C': 0.1}"]
+
     def test_no_score_method_raises(self, grid_search):
         model, dataset_loader_train = Mock(spec=['fit', 'predict']), Mock()
         dataset_loader_train.return_value = object(), object()
@@ -342,7 +500,7 @@ class TestGridSearch:
 
         grid_search(dataset_loader_train, model, {}, scoring=scoring)
         GridSearchCVWithScores.assert_called_with(
-            model, refit=False, scoring=scoring)
+            model, refit=False, n_jobs=-1, scoring=scoring)
 
     def test_deprecated_scoring(self, grid_search, GridSearchCVWithScores):
         # 'scoring' inside of 'grid_search' is deprecated
@@ -355,7 +513,7 @@ class TestGridSearch:
             grid_search(dataset_loader_train, model,
                         {'scoring': scoring}, scoring=None)
         GridSearchCVWithScores.assert_called_with(
-            model, refit=False, scoring=scoring)
+            model, refit=False, n_jobs=-1, scoring=scoring)
 
     def test_persist_best_requires_persister(self, grid_search):
         model = Mock(spec=['fit', 'predict'])
@@ -379,7 +537,7 @@ class TestGridSearch:
         grid_search(dataset_loader_train, model, {}, scoring=scoring,
                     persist_best=True, model_persister=model_persister)
         GridSearchCVWithScores.assert_called_with(
-            model, refit=True, scoring=scoring)
+            model, refit=True, n_jobs=-1, scoring=scoring)
         model_persister.write.assert_called_with(
             GridSearchCVWithScores())
 
@@ -400,11 +558,11 @@ class TestGridSearch:
             'std_test_score': [0.06463643, 0.05073433],
             'params': [{'C': 0.1}, {'C': 0.3}],
             }
-        with patch('palladium.fit.GridSearchCV') as GridSearchCV:
+        with patch('sklearn.model_selection.GridSearchCV') as GridSearchCV:
             GridSearchCV().cv_results_ = scores
             grid_search(dataset_loader_train, model, grid_search_params)
 
-        GridSearchCV.assert_called_with(model, refit=False,
+        GridSearchCV.assert_called_with(model, refit=False, n_jobs=-1,
                                         cv=CVIterator.return_value)
         CVIterator.assert_called_with(n=10, p=2)
 
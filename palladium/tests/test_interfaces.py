@@ -1,3 +1,4 @@
+import pickle
 from unittest.mock import MagicMock
 
 import pytest
@@ -21,6 +22,18 @@ class TestAnnotate:
         assert annotate(model, {'one': '11'}) == {'one': '11'}
         assert model.__metadata__['one'] == '11'
 
+    def test_shared_data_not_modified(self, annotate):
+        class Model:
+            __metadata__ = {'one': 1}
+
+        model = Model()
+        annotate(model, {'two': 2})
+        assert annotate(model) == {'one': 1, 'two': 2}
+        assert Model.__metadata__ == {'one': 1}
+
+    def test_no_data(self, annotate):
+        assert annotate(TestAnnotate()) == {}
+
 
 def load_data_decorator(func):
     def inner(self):
@@ -57,3 +70,7 @@ class TestPredictError:
 
     def test_str(self, PredictError):
         assert str(PredictError("message", 123)) == "message (123)"
+
+    def test_pickle(self, PredictError):
+        error = pickle.loads(pickle.dumps(PredictError("message", 123)))
+        assert (error.error_message, error.error_code) == ("message", 123)
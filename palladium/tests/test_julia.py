@@ -1,3 +1,4 @@
+import pickle
 from unittest.mock import call
 from unittest.mock import Mock
 from unittest.mock import patch
@@ -17,6 +18,16 @@ def bridge(monkeypatch):
     return make_bridge.return_value
 
 
+def test_make_bridge(monkeypatch):
+    from palladium.julia import make_bridge
+
+    Julia = Mock()
+    monkeypatch.setattr('palladium.julia.Julia', Julia)
+    monkeypatch.setattr('palladium.julia._bridge', None)
+    assert make_bridge() is make_bridge() is Julia.return_value
+    assert Julia.call_count == 1
+
+
 class TestAbstractModel:
     @fixture
     def Model(self):
@@ -43,59 +54,103 @@ class TestAbstractModel:
         assert call('myjulia.fit_func') in bridge.mock_calls
         assert call('yourjulia.predict_func') in bridge.mock_calls
 
+    def test_initialize_julia_cached(self, Model, model, bridge):
+        model._initialize_julia()
+        other = Model(
+            fit_func='myjulia.fit_func',
+            predict_func='yourjulia.predict_func',
+            )
+        other._initialize_julia()
+        assert other.fit_func_ is model.fit_func_
+        assert bridge.call.call_count == 2
+        assert bridge.eval.call_count == 2
+
+    def test_initialize_julia_same_module(self, Model, bridge):
+        model = Model(
+            fit_func='myjulia.fit_func',
+            predict_func='myjulia.predict_func',
+            )
+        model._initialize_julia()
+        bridge.call.assert_called_once_with('import myjulia')
+        assert bridge.eval.call_count == 2
+
     def test_fit(self, model):
-        X, y = Mock(), Mock()
+        X, y = np.array([[1.0, 2.0], [3.0, 4.0]]), Mock()
         assert model.fit(X, y) is model
         fit_func = model.fit_func_
-        fit_func.assert_called_with(X.T, y, fit='kwargs')
+        X_conv, y_conv = fit_func.call_args[0]
+        assert X_conv.base is X
+        assert np.all(X_conv == X.T)
+        assert y_conv is y
+        assert fit_func.call_args[1] == {'fit': 'kwargs'}
         assert model.fitted_ == fit_func.return_value
 
     def test_fit_with_label_encoder(self, model):
         model.encode_labels = True
-        X, y = Mock(), Mock()
-        with patch('palladium.julia.LabelEncoder') as encoder:
-            model.fit(X, y) is model
+        X = np.array([[1.0, 2.0], [3.0, 4.0], [5.0, 6.0]])
+        y = np.array(['b', 'a', 'b'])
+        model.fit(X, y) is model
         fit_func = model.fit_func_
-        transform = encoder().fit_transform
-        fit_func.assert_called_with(X.T, transform.return_value, fit='kwargs')
+        assert fit_func.call_args[0][1].tolist() == [1, 0, 1]
+        assert model.classes_.tolist() == ['a', 'b']
 
     def test_predict(self, model):
-        X = Mock()
+        X = np.array([[1.0, 2.0], [3.0, 4.0]])
         model.fitted_ = Mock()
         model._initialize_julia()
         result = model.predict(X)
         predict_func = model.predict_func_
-        predict_func.assert_called_with(
-            model.fitted_, X.astype().T, predict='kwargs')
+        fitted, X_conv = predict_func.call_args[0]
+        assert fitted is model.fitted_
+        assert np.all(X_conv == X.T)
+        assert predict_func.call_args[1] == {'predict': 'kwargs'}
         assert result == predict_func.return_value
 
     def test_predict_with_label_encoder(self, model):
         model.encode_labels = True
-        X = Mock()
+        X = np.array([[1.0, 2.0], [3.0, 4.0]])
         model.fitted_ = Mock()
-        model.enc_ = Mock()
-        inverse_transform = model.enc_.inverse_transform
+        model.classes_ = np.array(['a', 'b'])
         model._initialize_julia()
+        model.predict_func_.return_value = np.array([1, 1, 0])
         result = model.predict(X)
-        assert result == inverse_transform.return_value
-        inverse_transform.assert_called_with(model.predict_func_.return_value)
+        assert result.tolist() == ['b', 'b', 'a']
 
     def test_predict_convert_to_float(self, model):
         X_in = np.array([1, 2, 3], dtype=object)
         model.fitted_ = Mock()
-        model.enc_ = Mock()
         model._initialize_julia()
         model.predict(X_in)
         X_conv = model.predict_func_.call_args[0][1]
         assert np.all(X_in == X_conv)
         assert X_conv.dtype == np.float64
 
-    def test_getstate(self, model):
+    def test_predict_float_no_copy(self, model):
+        X_in = np.array([[1.0, 2.0], [3.0, 4.0]])
+        model.fitted_ = Mock()
+        model._initialize_julia()
+        model.predict(X_in)
+        X_conv = model.predict_func_.call_args[0][1]
+        assert X_conv.base is X_in
+
+    def test_predict_fortran_order(self, model):
+        X_in = np.asfortranarray([[1.0, 2.0], [3.0, 4.0]])
+        model.fitted_ = Mock()
+        model._initialize_julia()
+        model.predict(X_in)
+        X_conv = model.predict_func_.call_args[0][1]
+        assert X_conv.flags['F_CONTIGUOUS']
+        assert np.all(X_conv == X_in.T)
+
+    def test_getstate(self, model, bridge):
         model._initialize_julia()
         model.fitted_ = Mock()
+        serialize = bridge.eval.return_value
+        serialize.return_value = np.frombuffer(b'data', dtype=np.uint8)
 
         state = model.__getstate__()
-        assert state['fitted_'] is not model.fitted_
+        assert state['fitted_'] == b'data'
+        serialize.assert_called_with(model.fitted_)
         assert 'fit_func_' not in state
         assert 'predict_func_' not in state
         assert 'bridge_' not in state
@@ -105,11 +160,66 @@ class TestAbstractModel:
         assert 'predict_func_' in idict
         assert 'bridge_' in idict
 
+    @pytest.mark.parametrize('protocol', [4, 5])
+    def test_pickle(self, Model, model, bridge, protocol):
+        model._initialize_julia()
+        model.fitted_ = Mock()
+        serialize = bridge.eval.return_value
+        serialize.return_value = np.frombuffer(b'data', dtype=np.uint8)
+
+        buffers = []
+        kwargs = {'buffer_callback': buffers.append} if protocol >= 5 else {}
+        data = pickle.dumps(model, protocol=protocol, **kwargs)
+        assert len(buffers) == (protocol >= 5)
+        serialize.reset_mock()
+        result = pickle.loads(data, buffers=buffers)
+        assert type(result) is Model
+        assert result.fit_kwargs == {'fit': 'kwargs'}
+        assert serialize.call_args[0][0] == b'data'
+
     def test_setstate(self, model, bridge):
         model.__setstate__(
-            {'fitted_': 'fitted', 'fit_kwargs': {'bl': 'arg'}})
-        assert model.fitted_ != 'fitted'
+            {'fitted_': b'fitted', 'fit_kwargs': {'bl': 'arg'}})
+        assert model.fitted_ != b'fitted'
         assert model.fitted_ == bridge.eval.return_value.return_value
+        bridge.eval.return_value.assert_called_with(b'fitted')
+
+    @pytest.mark.parametrize('wrap', [memoryview, pickle.PickleBuffer])
+    def test_setstate_buffer(self, model, bridge, wrap):
+        model.__setstate__({'fitted_': wrap(b'fitted')})
+        arg = bridge.eval.return_value.call_args[0][0]
+        assert type(arg) is bytes
+        assert arg == b'fitted'
+
+    def test_setstate_warmup(self, model, bridge):
+        predict_func = bridge.eval.return_value
+        model.__setstate__({
+            'fitted_': b'fitted', 'warmup': True, 'n_features_in_': 3,
+            'predict_kwargs': {'predict': 'kwargs'}})
+        fitted, X = predict_func.call_args[0]
+        assert fitted is model.fitted_
+        assert X.shape == (3, 1)
+        assert X.flags['F_CONTIGUOUS']
+        assert predict_func.call_args[1] == {'predict': 'kwargs'}
+
+    def test_setstate_warmup_fails(self, model, bridge):
+        # The bridge's mock serves as both deserialize and predict_func:
+        predict_func = bridge.eval.return_value
+        model.__setstate__({'fitted_': b'fitted', 'n_features_in_': 3})
+        predict_func.side_effect = [model.fitted_, ValueError("boom")]
+        model.__setstate__({
+            'fitted_': b'fitted', 'warmup': True, 'n_features_in_': 3})
+        assert predict_func.call_count == 3
+
+    def test_setstate_no_warmup(self, model, bridge):
+        model.__setstate__({'fitted_': b'fitted', 'n_features_in_': 3})
+        assert bridge.eval.return_value.call_count == 1
+
+    def test_setstate_label_encoder(self, model, bridge):
+        enc = Mock(classes_=np.array(['a', 'b']))
+        model.__setstate__({'fitted_': b'fitted', 'enc_': enc})
+        assert model.classes_ is enc.classes_
+        assert not hasattr(model, 'enc_')
 
 
 class TestClassificationModel(TestAbstractModel):
@@ -119,9 +229,21 @@ class TestClassificationModel(TestAbstractModel):
         return ClassificationModel
 
     def test_score(self, model):
-        X, y = Mock(), Mock()
+        X = Mock()
         with patch('palladium.julia.accuracy_score') as accuracy_score:
             with patch('palladium.julia.AbstractModel.predict') as predict:
-                model.score(X, y)
-        accuracy_score.assert_called_with(predict.return_value, y)
+                predict.return_value = np.array(['a', 'b', 'b', 'a'])
+                score = model.score(X, ['a', 'b', 'a', 'a'])
+        assert score == 0.75
+        assert accuracy_score.call_count == 0
         predict.assert_called_with(X)
+
+    def test_score_fallback(self, model):
+        X, y = Mock(), np.array([[1, 0], [1, 1]])
+        with patch('palladium.julia.accuracy_score') as accuracy_score:
+            with patch('palladium.julia.AbstractModel.predict') as predict:
+                predict.return_value = np.array([[1, 0], [0, 1]])
+                score = model.score(X, y)
+        assert score is accuracy_score.return_value
+        assert accuracy_score.call_args[0][0] is predict.return_value
+        assert accuracy_score.call_args[0][1] is y
@@ -1,11 +1,15 @@
+import base64
+import builtins
 import codecs
 import copy
 import gzip
 import json
+import math
 import os
 import pickle
 import posixpath
 from threading import Thread
+from time import monotonic
 from unittest.mock import Mock
 from unittest.mock import MagicMock
 from unittest.mock import patch
@@ -58,6 +62,80 @@ class TestUpgradeSteps:
         results = steps.run(persister, '0.3', '1.0')
         assert results == []
 
+    def test_versions_compared_numerically(self, steps):
+        step = Mock()
+        steps.add('0.10')(step)
+        assert steps.run(None, '0.9', '0.10') == [step.return_value]
+        assert steps.run(None, '0.10', '0.11.dev0') == []
+
+    def test_add_after_run(self, three_steps):
+        step1, step2, step3, steps = three_steps
+        steps.run(None, '0.0', '1.0')
+        step0 = Mock()
+        steps.add('0.1.5')(step0)
+        steps.add('0.2')(Mock())
+        results = steps.run(None, '0.0', '0.2')
+        assert results[:3] == [
+            step1.return_value, step0.return_value, step2.return_value]
+        assert len(results) == 4
+
+
+class TestGzip:
+    @pytest.fixture
+    def _gzip(self):
+        from palladium.persistence import _gzip
+        return _gzip
+
+    def test_no_isal(self, _gzip):
+        with patch('palladium.persistence.igzip', None):
+            assert _gzip() is gzip
+            assert _gzip(1) is gzip
+
+    @pytest.mark.parametrize('compresslevel, isal', [
+        (None, True), (0, True), (3, True), (6, False), (9, False)])
+    def test_isal(self, _gzip, compresslevel, isal):
+        with patch('palladium.persistence.igzip') as igzip:
+            assert (_gzip(compresslevel) is igzip) == isal
+
+
+@pytest.mark.parametrize('use_orjson', [True, False])
+def test_json_loads(use_orjson, monkeypatch):
+    from palladium.persistence import _json_loads
+    if use_orjson:
+        pytest.importorskip('orjson')
+    else:
+        monkeypatch.setattr('palladium.persistence.orjson', None)
+    md = {'models': [{'version': 1, 'score': 0.5}], 'properties': {}}
+    assert _json_loads(json.dumps(md, indent=4)) == md
+    assert _json_loads(b'{"x": [1, 2]}') == {'x': [1, 2]}
+    result = _json_loads(json.dumps({'score': float('nan')}))
+    assert math.isnan(result['score'])
+
+
+class TestChunkWriter:
+    @pytest.fixture
+    def ChunkWriter(self):
+        from palladium.persistence import _ChunkWriter
+        return _ChunkWriter
+
+    def test_chunks(self, ChunkWriter):
+        writer = ChunkWriter(4)
+        data = b'abcdef'
+        assert writer.write(b'a') == 1
+        assert writer.write(bytearray(b'bcdef')) == 5
+        assert writer.write(b'ghij') == 4
+        writer.write(data)
+        writer.close()
+        assert writer.chunks == [b'abcd', b'efgh', b'ijab', b'cdef']
+        assert all(type(chunk) is bytes for chunk in writer.chunks)
+
+    def test_whole_chunk_not_copied(self, ChunkWriter):
+        writer = ChunkWriter(4)
+        data = b'abcd'
+        writer.write(data)
+        writer.close()
+        assert writer.chunks[0] is data
+
 
 class TestFile:
     @pytest.fixture
@@ -136,30 +214,52 @@ class TestFile:
             assert exc.value.args[0] == 'No such version: 1'
 
     def test_write_no_model_files(self, File):
-        with patch('palladium.persistence.File.list_models') as lm,\
+        md = {'models': [], 'properties': {}}
+        with patch('palladium.persistence.File._read_md') as read_md,\
             patch('palladium.persistence.File._update_md') as update_md,\
             patch('palladium.persistence.open') as open,\
             patch('palladium.persistence.gzip.open') as gzopen,\
             patch('palladium.persistence.pickle.dump') as dump:
-            lm.return_value = []
+            read_md.return_value = md
             gzopen.return_value = MagicMock()
             model = MagicMock()
             result = File('/models/model-{version}').write(model)
             open.assert_called_with('/models/model-1.pkl.gz', 'wb')
+            gzopen.assert_called_with(
+                open.return_value.__enter__.return_value, 'wb',
+                compresslevel=6)
             dump.assert_called_with(
                 model,
                 gzopen.return_value.__enter__.return_value,
+                protocol=5,
                 )
-            update_md.assert_called_with({'models': [model.__metadata__]})
+            update_md.assert_called_with(
+                {'models': [model.__metadata__]})
+            assert read_md.call_count == 1
             assert result == 1
 
+    def test_write_compresslevel(self, File):
+        with patch('palladium.persistence.File._read_md') as read_md,\
+            patch('palladium.persistence.File._update_md'),\
+            patch('palladium.persistence.open') as open,\
+            patch('palladium.persistence.gzip.open') as gzopen,\
+            patch('palladium.persistence.pickle.dump'):
+            read_md.return_value = {'models': [], 'properties': {}}
+            gzopen.return_value = MagicMock()
+            File('/models/model-{version}', compresslevel=1).write(
+                MagicMock())
+            gzopen.assert_called_with(
+                open.return_value.__enter__.return_value, 'wb',
+                compresslevel=1)
+
     def test_write_with_model_files(self, File):
-        with patch('palladium.persistence.File.list_models') as lm,\
+        md = {'models': [{'version': 99}], 'properties': {}}
+        with patch('palladium.persistence.File._read_md') as read_md,\
             patch('palladium.persistence.File._update_md') as update_md,\
             patch('palladium.persistence.open') as open,\
             patch('palladium.persistence.gzip.open') as gzopen,\
             patch('palladium.persistence.pickle.dump') as dump:
-            lm.return_value = [{'version': 99}]
+            read_md.return_value = md
             gzopen.return_value = MagicMock()
             model = MagicMock()
             result = File('/models/model-{version}').write(model)
@@ -167,6 +267,7 @@ class TestFile:
             dump.assert_called_with(
                 model,
                 gzopen.return_value.__enter__.return_value,
+                protocol=5,
                 )
             update_md.assert_called_with(
                 {'models': [{'version': 99}, model.__metadata__]})
@@ -176,12 +277,13 @@ class TestFile:
         model = MagicMock(__metadata__={
             'existing': 'entry', 'version': 'overwritten'})
 
-        with patch('palladium.persistence.File.list_models') as lm,\
+        md = {'models': [{'version': 99}], 'properties': {}}
+        with patch('palladium.persistence.File._read_md') as read_md,\
             patch('palladium.persistence.File._update_md') as update_md,\
             patch('palladium.persistence.gzip.open'),\
             patch('palladium.persistence.open'),\
             patch('palladium.persistence.pickle.dump'):
-            lm.return_value = [{'version': 99}]
+            read_md.return_value = md
             File('/models/model-{version}').write(model)
             assert model.__metadata__ == {
                 'existing': 'entry',
@@ -191,10 +293,10 @@ class TestFile:
                 {'models': [{'version': 99}, model.__metadata__]})
 
     def test_list_models_no_metadata(self, File):
-        with patch('palladium.persistence.os.path.exists') as exists:
-            exists.return_value = False
+        with patch('palladium.persistence.FileIO.stamp') as stamp:
+            stamp.return_value = False
             assert File('model-{version}').list_models() == []
-            exists.assert_called_with('model-metadata.json')
+            stamp.assert_called_with('model-metadata.json')
 
     def test_list_models_with_metadata(self, File):
         with patch('palladium.persistence.File._read_md') as read_md:
@@ -203,12 +305,12 @@ class TestFile:
 
     def test_list_properties_no_metadata(self, File):
         from palladium import __version__
-        with patch('palladium.persistence.os.path.exists') as exists:
-            exists.return_value = False
+        with patch('palladium.persistence.FileIO.stamp') as stamp:
+            stamp.return_value = False
             assert File('model-{version}').list_properties() == {
                 'db-version': __version__,
                 }
-            exists.assert_called_with('model-metadata.json')
+            stamp.assert_called_with('model-metadata.json')
 
     def test_list_properties_with_metadata(self, File):
         with patch('palladium.persistence.File._read_md') as read_md:
@@ -240,27 +342,58 @@ class TestFile:
                 'properties': {},
                 }
 
+    def test_update_md_base(self, File):
+        base = {'models': [1], 'properties': {}}
+        with patch('palladium.persistence.File._read_md') as read_md,\
+            patch('builtins.open') as open:
+            File('model-{version}')._update_md_orig({'models': [2]}, base=base)
+            assert read_md.call_count == 0
+            fh = open.return_value.__enter__.return_value
+            json_written = json.loads(fh.write.call_args[0][0].decode('utf-8'))
+            assert json_written == {'models': [2], 'properties': {}}
+
     def test_read_md(self, File):
         with patch('builtins.open') as open,\
-             patch('palladium.persistence.os.path.exists') as exists,\
+             patch('palladium.persistence.FileIO.stamp') as stamp,\
              patch('palladium.persistence.json.load') as load:
-            exists.return_value = True
+            stamp.return_value = True
             result = File('model-{version}')._read_md()
-            exists.assert_called_with('model-metadata.json')
+            stamp.assert_called_with('model-metadata.json')
             open.assert_called_with('model-metadata.json', 'r')
             load.assert_called_with(
                 open.return_value.__enter__.return_value,
                 )
             assert result == load.return_value
 
-    def test_read_md_no_file(self, File):
+    def test_read_md_cached(self, File, tmpdir):
+        persister = File(str(tmpdir.join('model-{version}')))
+        persister._update_md_orig({'properties': {'active-model': '1'}})
+        with patch.object(persister.io, 'open',
+                          wraps=persister.io.open) as open:
+            md = persister._read_md()
+            md['properties']['active-model'] = '2'
+            assert persister.list_properties()['active-model'] == '1'
+            assert open.call_count == 1
+
+            # Modifications through another handle are picked up:
+            stat = os.stat(persister._md_filename)
+            with builtins.open(persister._md_filename, 'w') as f:
+                json.dump({'models': [], 'properties': {}}, f)
+            os.utime(persister._md_filename, ns=(
+                stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+            assert persister.list_properties() == {}
+            assert open.call_count == 2
+
+    def test_read_md_no_file(self, File, tmpdir):
         from palladium import __version__
+        persister = File(str(tmpdir.join('model-{version}')))
+        assert persister.io.stamp(persister._md_filename) is False
         with patch('palladium.persistence.os.path.exists') as exists:
-            exists.return_value = False
-            assert File('model-{version}')._read_md() == {
+            assert persister._read_md() == {
                 'models': [],
                 'properties': {'db-version': __version__},
                 }
+        assert exists.call_count == 0
 
     def test_activate(self, File):
         with patch('palladium.persistence.File._read_md') as read_md,\
@@ -272,7 +405,7 @@ class TestFile:
             File('model-{version}').activate(1)
             update_md.assert_called_with({
                 'properties': {'active-model': '1'},
-                })
+                }, base=read_md.return_value)
 
     def test_activate_bad_version(self, File):
         with patch('palladium.persistence.File._read_md') as read_md,\
@@ -311,6 +444,20 @@ class TestFile:
                 })
             os.remove.assert_called_with('model-1.pkl.gz')
 
+    def test_activate_during_write(self, File, tmpdir, monkeypatch):
+        monkeypatch.setattr(File, '_update_md', File._update_md_orig)
+        persister = File(str(tmpdir.join('model-{version}')))
+        persister.write(Dummy(name='model1'))
+
+        # Activating a model while another one is being written:
+        def dump(model, f, protocol):
+            persister.activate(1)
+
+        with patch('palladium.persistence.pickle.dump', dump):
+            persister.write(Dummy(name='model2'))
+        assert persister.list_properties()['active-model'] == '1'
+        assert len(persister.list_models()) == 2
+
     def test_delete_bad_version(self, File):
         with patch('palladium.persistence.File._read_md') as read_md,\
              patch('palladium.persistence.File._update_md') as update_md,\
@@ -554,6 +701,96 @@ class TestDatabase:
         assert database.read() == model
         assert model.__metadata__['version'] == 1
 
+    def test_write_protocol(self, database):
+        model = Dummy(name='mymodel')
+        with patch('palladium.persistence.pickle.dump',
+                   wraps=pickle.dump) as dump:
+            database.write(model)
+        assert dump.call_args[1]['protocol'] == 5
+
+    def test_write_chunks(self, database):
+        from palladium.util import session_scope
+
+        model = Dummy(name='mymodel')
+        version = database.write(model)
+        with session_scope(database.session) as session:
+            blobs = [
+                bytes(chunk.blob) for chunk in
+                session.query(database.DBModelChunk).filter_by(
+                    model_version=version).order_by('id')
+                ]
+        assert all(len(blob) == 4 for blob in blobs[:-1])
+        assert 0 < len(blobs[-1]) <= 4
+        assert pickle.loads(gzip.decompress(b''.join(blobs))) == model
+
+    def test_read_streams_chunks(self, database, dbmodel):
+        from palladium import persistence
+
+        reads = []
+        ChunkReader = persistence._ChunkReader
+
+        class MyChunkReader(ChunkReader):
+            def readinto(self, buffer):
+                size = super().readinto(buffer)
+                reads.append(size)
+                return size
+
+        with patch('palladium.persistence._ChunkReader', MyChunkReader):
+            assert database.read(1) == dbmodel
+        assert 0 < max(reads) <= 4
+
+    def test_read_fetches_in_thread(self, database, dbmodel):
+        from threading import get_ident
+
+        threads = []
+        fetch_chunks = database._fetch_chunks
+
+        def _fetch_chunks(*args):
+            threads.append(get_ident())
+            return fetch_chunks(*args)
+
+        with patch.object(database, '_fetch_chunks', _fetch_chunks):
+            assert database.read(1) == dbmodel
+        assert threads and threads[0] != get_ident()
+
+    def test_read_fetch_error(self, database, dbmodel):
+        with patch.object(database.session, 'query',
+                          side_effect=[database.session.query(
+                              database.DBModel.version), ValueError('boom')]):
+            with pytest.raises(ValueError):
+                database.read(1)
+
+    def test_read_no_chunk_objects(self, database, dbmodel):
+        from sqlalchemy import event
+
+        loaded = []
+        event.listen(database.DBModelChunk, 'load',
+                     lambda target, context: loaded.append(target))
+        assert database.read(1) == dbmodel
+        assert loaded == []
+
+    def test_write_no_chunk_objects(self, database):
+        from sqlalchemy import event
+
+        inserted = []
+        event.listen(database.DBModelChunk, 'before_insert',
+                     lambda mapper, connection, target: inserted.append(target))
+        model = Dummy(name='mymodel', data=list(range(100)))
+        version = database.write(model)
+        assert inserted == []
+        assert database.read(version) == model
+
+    @pytest.mark.parametrize('compresslevel', [None, 1])
+    def test_write_compresslevel(self, database, compresslevel):
+        model = Dummy(name='mymodel')
+        if compresslevel is not None:
+            database.compresslevel = compresslevel
+        with patch('palladium.persistence.gzip.GzipFile',
+                   wraps=gzip.GzipFile) as GzipFile:
+            version = database.write(model)
+        assert GzipFile.call_args[1]['compresslevel'] == (compresslevel or 6)
+        assert database.read(version) == model
+
     def test_write_with_existing_entry(self, database, dbmodel):
         model = Dummy(name='mymodel')
         database.activate(database.write(model))
@@ -639,6 +876,24 @@ class TestDatabase:
         assert database.list_properties() == {
             'db-version': '1.0', 'active-model': '2'}
 
+    def test_model_version_index(self, database):
+        from sqlalchemy import inspect
+
+        indexes = inspect(database.engine).get_indexes('model_chunks')
+        assert [index['column_names'] for index in indexes] == [
+            ['model_version']]
+
+    def test_init_adds_chunks_index(self, Database, database, dbmodel):
+        from sqlalchemy import inspect
+
+        index, = database.DBModelChunk.__table__.indexes
+        index.drop(bind=database.engine)
+        assert inspect(database.engine).get_indexes('model_chunks') == []
+        for i in range(2):
+            database = Database(str(database.engine.url), chunk_size=4)
+        assert len(inspect(database.engine).get_indexes('model_chunks')) == 1
+        assert database.read(1) == dbmodel
+
     def test_table_postfix_default(self, Database, request):
         path = '/tmp/palladium.testing-{}.sqlite'.format(os.getpid())
         request.addfinalizer(lambda: os.remove(path))
@@ -669,6 +924,36 @@ class TestDatabase:
         db = Database('sqlite:///{}'.format(path), poolclass=QueuePool)
         assert isinstance(db.engine.pool, QueuePool)
 
+    def test_init_poolclass_dotted_name(self, Database, request):
+        from sqlalchemy.pool import QueuePool
+        path = '/tmp/palladium.testing-{}.sqlite'.format(os.getpid())
+        request.addfinalizer(lambda: os.remove(path))
+        db = Database(
+            'sqlite:///{}'.format(path),
+            poolclass='sqlalchemy.pool.QueuePool',
+            engine_kwargs={'pool_size': 3},
+            )
+        assert isinstance(db.engine.pool, QueuePool)
+        assert db.engine.pool.size() == 3
+        assert db.engine.pool._pre_ping
+        db.write(Dummy())
+        assert db.list_models()[0]['version'] == 1
+
+    def test_read_single_connection(self, Database, request):
+        path = '/tmp/palladium.testing-{}.sqlite'.format(os.getpid())
+        request.addfinalizer(lambda: os.remove(path))
+        db = Database(
+            'sqlite:///{}'.format(path),
+            poolclass='sqlalchemy.pool.QueuePool',
+            engine_kwargs={
+                'pool_size': 1, 'max_overflow': 0, 'pool_timeout': 3},
+            chunk_size=4,
+            )
+        db.write(Dummy(name='mymodel'))
+        db.activate(1)
+        assert db.read().name == 'mymodel'
+        assert db.read(1).name == 'mymodel'
+
 
 @pytest.fixture
 def mocked_requests():
@@ -703,7 +988,7 @@ class TestRest:
         put_model_body = None
         def handle_put_model(request, context):
             nonlocal put_model_body
-            put_model_body = request.body.read()
+            put_model_body = request.body
             return ''
 
         put_model_url = "%s/mymodel-1.pkl.gz" % (self.base_url,)
@@ -716,7 +1001,7 @@ class TestRest:
         put_md_body = None
         def handle_put_md(request, context):
             nonlocal put_md_body
-            put_md_body = request.body.read()
+            put_md_body = request.body
             return ''
 
         put_md_url = "%s/mymodel-metadata.json" % (self.base_url,)
@@ -777,7 +1062,7 @@ class TestRest:
         put_md_body = None
         def handle_put_md(request, context):
             nonlocal put_md_body
-            put_md_body = request.body.read()
+            put_md_body = request.body
             return ''
 
         put_md_url = "%s/mymodel-metadata.json" % (self.base_url,)
@@ -799,6 +1084,39 @@ class TestRest:
         assert len(json.loads(put_md_body.decode('utf-8'))['models']) == 0
         self.assert_auth_headers(mocked_requests)
 
+    def test_metadata_cached(self, mocked_requests, persister):
+        md_url = "%s/mymodel-metadata.json" % (self.base_url,)
+        mocked_requests.head(md_url, headers={'ETag': '"1"'})
+        get_md = mocked_requests.get(
+            md_url,
+            json={"models": [{"version": 1}], "properties": {}},
+            )
+        assert persister.list_models() == [{"version": 1}]
+        assert persister.list_models() == [{"version": 1}]
+        assert get_md.call_count == 1
+
+        mocked_requests.head(md_url, headers={'ETag': '"2"'})
+        persister.list_models()
+        assert get_md.call_count == 2
+
+    def test_metadata_no_stamp(self, mocked_requests, persister):
+        md_url = "%s/mymodel-metadata.json" % (self.base_url,)
+        head_md = mocked_requests.head(md_url)
+        get_md = mocked_requests.get(
+            md_url,
+            json={"models": [{"version": 1}], "properties": {}},
+            )
+        assert persister.list_models() == [{"version": 1}]
+        assert persister.list_models() == [{"version": 1}]
+        assert head_md.call_count == 2
+        assert get_md.call_count == 2
+
+    def test_metadata_missing(self, mocked_requests, persister):
+        md_url = "%s/mymodel-metadata.json" % (self.base_url,)
+        head_md = mocked_requests.head(md_url, status_code=404)
+        assert persister.list_models() == []
+        assert head_md.call_count == 1
+
 
 class TestRestIO:
     @pytest.fixture
@@ -810,6 +1128,61 @@ class TestRestIO:
         with pytest.raises(NotImplementedError):
             io.open('haha', mode='a')
 
+    def test_write_small(self, io, mocked_requests):
+        mocked_requests.put('https://example.com/model')
+        with patch('palladium.persistence.SpooledTemporaryFile.rollover',
+                   side_effect=AssertionError) as rollover:
+            with io.open('https://example.com/model', 'wb') as fh:
+                fh.write(b'data')
+        assert rollover.call_count == 0
+        assert mocked_requests.last_request.body == b'data'
+
+    def test_write_large(self, io, mocked_requests):
+        io.spool_max_size = 2
+        body = None
+
+        def handle_put(request, context):
+            nonlocal body
+            body = request.body.read()
+
+        mocked_requests.put('https://example.com/model', text=handle_put)
+        with io.open('https://example.com/model', 'wb') as fh:
+            fh.write(b'data')
+        assert body == b'data'
+
+    def test_stream(self, io, mocked_requests, monkeypatch):
+        monkeypatch.setattr('palladium.persistence.STREAM_CHUNK_SIZE', 3)
+        io.stream_uploads = True
+        chunks = []
+
+        def handle_put(request, context):
+            assert request.headers['Transfer-Encoding'] == 'chunked'
+            chunks.extend(request.body)
+
+        mocked_requests.put('https://example.com/model', text=handle_put)
+        with io.open('https://example.com/model', 'wb') as fh:
+            fh.write(b'data')
+            fh.write(b'more')
+        assert chunks == [b'dat', b'amo', b're']
+
+    def test_stream_aborted(self, io, mocked_requests):
+        io.stream_uploads = True
+        errors = []
+
+        def handle_put(request, context):
+            try:
+                b''.join(request.body)
+            except IOError as exc:
+                errors.append(exc)
+                raise
+
+        mocked_requests.put('https://example.com/model', text=handle_put)
+        with pytest.raises(ValueError):
+            with io.open('https://example.com/model', 'wb') as fh:
+                fh.write(b'data')
+                raise ValueError()
+        assert len(errors) == 1
+
 
 class TestDatabaseCLOB(TestDatabase):
     @pytest.fixture
@@ -817,6 +1190,14 @@ class TestDatabaseCLOB(TestDatabase):
         from palladium.persistence import DatabaseCLOB
         return DatabaseCLOB
 
+    def test_base64_type(self, Database):
+        type_ = Database.BytesToBase64Type()
+        data = bytes(range(256))
+        encoded = type_.process_bind_param(memoryview(data), None)
+        assert encoded == base64.b64encode(data).decode('ascii')
+        assert type_.process_result_value(encoded, None) == data
+        assert type_.process_bind_param(None, None) is None
+
 
 class TestCachedUpdatePersister:
     @pytest.fixture
@@ -842,6 +1223,48 @@ class TestCachedUpdatePersister:
         persister.write('mymodel')
         persister.impl.write.assert_called_with('mymodel')
 
+    def test_metadata_no_ttl(self, persister):
+        persister.impl.list_properties.return_value = {'active-model': '1'}
+        assert persister.list_properties() == {'active-model': '1'}
+        assert persister.list_properties() == {'active-model': '1'}
+        assert persister.impl.list_properties.call_count == 3
+
+    def test_metadata_ttl(self, persister):
+        persister.metadata_ttl = 60
+        impl = persister.impl
+        impl.list_models.return_value = [{'version': 1}]
+        assert persister.list_models() == [{'version': 1}]
+        persister.list_models().append({'version': 2})
+        assert persister.list_models() == [{'version': 1}]
+        assert impl.list_models.call_count == 1
+
+        impl.list_models.return_value = [{'version': 1}, {'version': 2}]
+        persister.write('mymodel')
+        assert len(persister.list_models()) == 2
+        persister.activate(2)
+        persister.list_models()
+        persister.delete(1)
+        persister.list_models()
+        assert impl.list_models.call_count == 4
+
+    def test_metadata_ttl_expired(self, persister):
+        persister.metadata_ttl = 60
+        persister.list_properties()
+        with patch('palladium.persistence.monotonic',
+                   return_value=monotonic() + 61):
+            persister.list_properties()
+        assert persister.impl.list_properties.call_count == 3
+
+    def test_update_cache_refreshes_metadata(self, persister):
+        persister.metadata_ttl = 60
+        impl = persister.impl
+        impl.list_properties.return_value = {'active-model': '1'}
+        persister.list_properties()
+        impl.list_properties.return_value = {'active-model': '2'}
+        persister.update_cache()
+        assert impl.read.call_count == 2
+        assert persister.list_properties() == {'active-model': '2'}
+
     def test_update_cache(self, persister):
         persister.update_cache()
         assert persister.read() is persister.impl.read.return_value
@@ -861,6 +1284,49 @@ class TestCachedUpdatePersister:
         persister.impl.read.assert_called_with(version=123)
         assert len(persister.impl.read.mock_calls) == 2
 
+    def test_shared_memory(self, CachedUpdatePersister, config,
+                           process_store):
+        from multiprocessing import shared_memory
+        import numpy as np
+
+        name = 'test-{}'.format(os.getpid())
+        model1 = {'coef': np.arange(1000, dtype=float), 'version': 1}
+        model2 = {'coef': np.arange(1000, dtype=float) * 2, 'version': 2}
+
+        impl1, impl2 = MagicMock(), MagicMock()
+        for impl in impl1, impl2:
+            impl.list_properties.return_value = {'active-model': '1'}
+        impl1.read.return_value = model1
+
+        owner = CachedUpdatePersister(impl1, shared_memory=name)
+        owner.initialize_component(config)
+        other = CachedUpdatePersister(impl2, shared_memory=name)
+        other.__pld_config_key__ = 'other'
+        other.initialize_component(config)
+
+        try:
+            assert owner.read() is model1
+            impl1.read.assert_called_with(version='1')
+            assert impl2.read.call_count == 0
+            assert (other.read()['coef'] == model1['coef']).all()
+            assert not other.read()['coef'].flags.writeable
+
+            for impl in impl1, impl2:
+                impl.list_properties.return_value = {'active-model': '2'}
+            impl1.read.return_value = model2
+            owner.update_cache()
+            other.update_cache()
+            impl1.read.assert_called_with(version='2')
+            assert (other.read()['coef'] == model2['coef']).all()
+            assert impl2.read.call_count == 0
+
+            # the owner removed the segment of the old version:
+            with pytest.raises(FileNotFoundError):
+                shared_memory.SharedMemory(name='pld-{}-1'.format(name))
+        finally:
+            owner._unlink_shm()
+            del process_store['other']
+
     def test_update_cache_rrule(self, process_store, CachedUpdatePersister,
                                 config):
         rrule_info = {
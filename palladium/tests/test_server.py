@@ -1,3 +1,4 @@
+from concurrent.futures import Future
 from datetime import datetime
 import io
 import json
@@ -171,6 +172,42 @@ class TestPredictService:
         assert sample[0] == 'myflower'
         assert sample[1] == 3
 
+    @pytest.mark.parametrize('unwrap_sample', [False, True])
+    def test_samples_from_data(self, PredictService, unwrap_sample):
+        mapping = [('name', 'str'), ('sepal width', 'int')]
+        predict_service = PredictService(
+            mapping=mapping[:1] if unwrap_sample else mapping,
+            unwrap_sample=unwrap_sample,
+            )
+
+        model = Mock()
+        data_list = [
+            {'name': 'myflower', 'sepal width': 3},
+            {'name': 'otherflower', 'sepal width': '4'},
+            ]
+        samples = predict_service.samples_from_data(model, data_list)
+        expected = np.array([
+            predict_service.sample_from_data(model, data)
+            for data in data_list
+            ])
+        assert samples.shape == expected.shape
+        assert samples.dtype == expected.dtype
+        assert samples.tolist() == expected.tolist()
+
+    def test_samples_from_data_custom(self, PredictService):
+        class MyPredictService(PredictService):
+            def sample_from_data(self, model, data):
+                return np.array([data['name'].upper()])
+
+        predict_service = MyPredictService(mapping=[('name', 'str')])
+        samples = predict_service.samples_from_data(
+            Mock(), [{'name': 'one'}, {'name': 'two'}])
+        assert samples.tolist() == [['ONE'], ['TWO']]
+
+    def test_unknown_type(self, PredictService):
+        with pytest.raises(KeyError):
+            PredictService(mapping=[('name', 'unicorn')])
+
     def test_unwrap_sample_get(self, PredictService, flask_app):
         predict_service = PredictService(
             mapping=[('text', 'str')],
@@ -248,6 +285,50 @@ class TestPredictService:
             "result": [0.1, 0.5, math.pi],
             }
 
+    @pytest.mark.parametrize('use_orjson', [False, True])
+    @pytest.mark.parametrize('y_pred', [
+        np.array([[0.1, 0.5], [0.25, 1.0]]),
+        np.array([[0.1, 0.5], [0.25, 1.0]], dtype=np.float32).T,
+        np.array([3, 2]),
+        np.array(['one', 'two'], dtype=object),
+        ])
+    def test_response_from_prediction(
+            self, PredictService, flask_app, monkeypatch, use_orjson, y_pred):
+        import palladium.server
+        if use_orjson:
+            pytest.importorskip('orjson')
+        else:
+            monkeypatch.setattr(palladium.server, 'orjson', None)
+
+        predict_service = PredictService(mapping=[])
+        with flask_app.test_request_context():
+            resp = predict_service.response_from_prediction(
+                y_pred, single=False)
+        resp_data = json.loads(resp.get_data(as_text=True))
+        assert resp.mimetype == 'application/json'
+        assert resp_data['result'] == y_pred.tolist()
+
+    @pytest.mark.parametrize('use_orjson', [False, True])
+    def test_response_from_prediction_non_finite(
+            self, PredictService, flask_app, monkeypatch, use_orjson):
+        import palladium.server
+        if use_orjson:
+            pytest.importorskip('orjson')
+        else:
+            monkeypatch.setattr(palladium.server, 'orjson', None)
+
+        predict_service = PredictService(mapping=[])
+        y_pred = np.array([0.5, np.nan, np.inf])
+        with flask_app.test_request_context():
+            resp = predict_service.response_from_prediction(
+                y_pred, single=False)
+        assert b'[0.5,NaN,Infinity]' in resp.get_data()
+
+        with flask_app.test_request_context():
+            resp = palladium.server.make_ujson_response(
+                {'models': [{'score': float('nan')}]})
+        assert resp.get_data() == b'{"models":[{"score":NaN}]}'
+
     def test_post_request(self, PredictService, flask_app):
         model = Mock()
         model.predict.return_value = np.array([3, 2])
@@ -306,6 +387,52 @@ class TestPredictService:
 
         assert json.loads(resp.get_data(as_text=True)) == expected_resp_data
 
+    def test_predict_batched(self, PredictService):
+        model = Mock()
+        model.predict.side_effect = lambda X: X[:, 0].astype(float) * 2
+
+        service = PredictService(
+            mapping=[('sepal length', 'float')],
+            batch_size=8,
+            batch_timeout_ms=200,
+            )
+
+        results = {}
+
+        def run(i):
+            samples = np.array([[i], [i + 0.5]], dtype=object)
+            results[i] = service.predict_batched(model, samples)
+
+        threads = [Thread(target=run, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert model.predict.call_count < 4
+        for i in range(4):
+            assert results[i].tolist() == [i * 2, i * 2 + 1]
+
+    def test_predict_batched_groups_params(self, PredictService):
+        model = Mock()
+        model.predict.side_effect = lambda X, threshold: X[:, 0] * threshold
+
+        service = PredictService(mapping=[], batch_size=4)
+        service._dispatch([
+            (model, np.array([[1]]), {'threshold': 2}, Future()),
+            (model, np.array([[1]]), {'threshold': 3}, Future()),
+            (model, np.array([[2]]), {'threshold': 2}, Future()),
+            ])
+        assert model.predict.call_count == 2
+
+    def test_predict_batched_error(self, PredictService):
+        model = Mock()
+        model.predict.side_effect = ValueError("boom")
+
+        service = PredictService(mapping=[], batch_size=4)
+        with pytest.raises(ValueError):
+            service.predict_batched(model, np.array([[1]]))
+
     @pytest.yield_fixture
     def mock_predict(self, monkeypatch):
         def mock_predict(model_persister, predict_service):
@@ -1,5 +1,7 @@
 from collections import OrderedDict
 from datetime import datetime
+import logging
+import sys
 import threading
 from time import sleep
 from unittest.mock import Mock
@@ -28,6 +30,14 @@ class TestResolveDottedName:
     def test_module(self, resolve_dotted_name):
         resolve_dotted_name('threading') is threading
 
+    def test_patched(self, resolve_dotted_name, monkeypatch):
+        dotted = 'palladium.tests.test_util.TestResolveDottedName'
+        assert resolve_dotted_name(dotted) is TestResolveDottedName
+        replacement = object()
+        monkeypatch.setattr(
+            sys.modules[__name__], 'TestResolveDottedName', replacement)
+        assert resolve_dotted_name(dotted) is replacement
+
 
 def test_args_from_config(config):
     from palladium.util import args_from_config
@@ -56,6 +66,56 @@ def test_args_from_config(config):
         myfunc()
     assert "Maybe you forgot to set" in str(e.value)
 
+    with pytest.raises(TypeError) as e:
+        myfunc(arg3='myarg3', arg6='myarg6')
+    assert "arg6" in str(e.value)
+    assert "Maybe you forgot to set" in str(e.value)
+
+    with patch('palladium.util.signature') as signature:
+        myfunc(arg3='myarg3')
+    assert signature.call_count == 0
+
+
+class TestTimer:
+    @pytest.fixture
+    def timer(self):
+        from palladium.util import timer
+        return timer
+
+    @pytest.fixture
+    def logger(self):
+        logger = logging.getLogger('palladium.tests.test_util.timer')
+        logger.setLevel(logging.INFO)
+        return logger
+
+    def test_it(self, timer):
+        log = Mock()
+        with timer(log, "Doing it") as info:
+            pass
+        assert log.call_args_list[0][0] == ("Doing it...",)
+        assert log.call_args_list[1][0][0].startswith("Doing it done in ")
+        assert info['elapsed'] >= 0
+
+    class Message:
+        formatted = 0
+
+        def __format__(self, spec):
+            self.formatted += 1
+            return "Doing it"
+
+    def test_disabled_level(self, timer, logger):
+        message = self.Message()
+        with timer(logger.debug, message) as info:
+            pass
+        assert message.formatted == 0
+        assert info['elapsed'] >= 0
+
+    def test_enabled_level(self, timer, logger):
+        message = self.Message()
+        with timer(logger.info, message):
+            pass
+        assert message.formatted == 2
+
 
 class TestProcessStore:
     @pytest.fixture
@@ -298,6 +358,32 @@ class TestPluggableDecorator:
         assert hasattr(myfunc2, '__wrapped__') is True
         assert myfunc2.__wrapped__ is myfunc
 
+    def test_install_empty_list(self, PluggableDecorator, config):
+        class MyClass:
+            def method(self, a):
+                return a + 1
+
+        method = MyClass.method
+        PluggableDecorator('decorator_list').install(MyClass, 'method')
+        assert MyClass.method is not method
+        assert MyClass().method(2) == 3
+        assert MyClass.method is method
+
+    def test_install(self, PluggableDecorator, config):
+        config['decorator_list'] = [
+            'palladium.tests.test_util.dec1',
+            'palladium.tests.test_util.dec2']
+
+        class MyClass:
+            def method(self, b):
+                return b + 3
+
+        method = MyClass.method
+        PluggableDecorator('decorator_list').install(MyClass, 'method')
+        assert MyClass().method(2) == 52
+        assert MyClass().method(2) == 52
+        assert MyClass.method.__wrapped__ is method
+
 
 class TestSessionScope:
 
@@ -4,13 +4,13 @@
 from collections import UserDict
 from contextlib import contextmanager
 from datetime import datetime
+from functools import lru_cache
 from functools import partial
 from functools import update_wrapper
 from functools import wraps
 import logging
 from importlib import import_module
 from inspect import signature
-from inspect import getcallargs
 import os
 import sys
 import threading
@@ -32,18 +32,27 @@ from .config import PALLADIUM_CONFIG_ERROR
 logger = logging.getLogger('palladium')
 
 
-def resolve_dotted_name(dotted_name):
+@lru_cache(maxsize=1024)
+def _split_dotted_name(dotted_name):
     if ':' in dotted_name:
         module, name = dotted_name.split(':')
     elif '.' in dotted_name:
         module, name = dotted_name.rsplit('.', 1)
     else:
         module, name = dotted_name, None
+    return module, tuple(name.split('.')) if name else ()
+
+
+def resolve_dotted_name(dotted_name):
+    module, names = _split_dotted_name(dotted_name)
 
-    attr = import_module(module)
-    if name:
-        for name in name.split('.'):
-            attr = getattr(attr, name)
+    # The attributes themselves are looked up every time, so that
+    # patched or reloaded modules are taken into account:
+    attr = sys.modules.get(module)
+    if attr is None:
+        attr = import_module(module)
+    for name in names:
+        attr = getattr(attr, name)
 
     return attr
 
@@ -62,18 +71,18 @@ def apply_kwargs(func, **kwargs):
 def args_from_config(func):
     """Decorator that injects parameters from the configuration.
     """
-    func_args = signature(func).parameters
+    # The signature is inspected once here, not on every call:
+    func_signature = signature(func)
+    func_args = tuple(func_signature.parameters)
 
     @wraps(func)
     def wrapper(*args, **kwargs):
         config = get_config()
-        for i, argname in enumerate(func_args):
-            if len(args) > i or argname in kwargs:
-                continue
-            elif argname in config:
+        for argname in func_args[len(args):]:
+            if argname not in kwargs and argname in config:
                 kwargs[argname] = config[argname]
         try:
-            getcallargs(func, *args, **kwargs)
+            func_signature.bind(*args, **kwargs)
         except TypeError as exc:
             msg = "{}\n{}".format(exc.args[0], PALLADIUM_CONFIG_ERROR)
             exc.args = (msg,)
@@ -84,8 +93,24 @@ def args_from_config(func):
     return wrapper
 
 
+def _log_enabled(log):
+    """Return False if *log* is a method like :meth:`logging.Logger.info`
+    of a logger that's not enabled for that level, True otherwise.
+    """
+    log_logger = getattr(log, '__self__', None)
+    if isinstance(log_logger, logging.Logger):
+        level = logging.getLevelName(log.__name__.upper())
+        if isinstance(level, int):
+            return log_logger.isEnabledFor(level)
+    return True
+
+
 @contextmanager
 def timer(log=None, message=None):
+    # Don't bother formatting messages that won't be logged anyway:
+    if log is not None and not _log_enabled(log):
+        log = None
+
     if log is not None:
         log("{}...".format(message))
 
@@ -290,6 +315,17 @@ class PluggableDecorator:
     def __init__(self, decorator_config_name):
         self.decorator_config_name = decorator_config_name
         self.wrapped = None
+        self.owner = None
+
+    def install(self, cls, name):
+        """Wrap the method *name* of class *cls*.
+
+        If no decorators are configured, the original method is put
+        back on *cls* when it's first called, and later calls go to
+        it directly.
+        """
+        self.owner, self.name = cls, name
+        setattr(cls, name, self(getattr(cls, name)))
 
     def __call__(self, func):
         self.func = func
@@ -313,6 +349,8 @@ class PluggableDecorator:
                     self.wrapped = wraps(orig_func)(func)
                 else:
                     self.wrapped = orig_func
+                    if self.owner is not None:
+                        setattr(self.owner, self.name, orig_func)
             return self.wrapped(*args, **kwargs)
 
         return wraps(func)(wrapper)
@@ -8,6 +8,7 @@ install_requires = [
     'flask',
     'joblib',
     'numpy',
+    'packaging',
     'pandas',
     'psutil',
     'requests',